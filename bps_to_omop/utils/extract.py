@@ -2,8 +2,13 @@
 Set of utilities to manage file processing and yaml parameters processing
 """
 
+import copy
 import os
 import re
+import shutil
+import tempfile
+from collections import OrderedDict
+from contextlib import contextmanager
 from itertools import product
 from pathlib import Path
 
@@ -12,6 +17,31 @@ import pyarrow as pa
 import pyarrow.compute as pc
 import yaml
 
+# Prefer the libyaml bindings when available, fall back to pure Python
+try:
+    from yaml import CSafeDumper as _YamlDumper
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeDumper as _YamlDumper
+    from yaml import SafeLoader as _YamlLoader
+
+# libyaml needs an integer line width, use the largest it accepts
+_YAML_WIDTH = 2**31 - 1
+
+# YAML contents updated with update_yaml_params() that are waiting to be
+# written to disk, keyed by absolute file path. See flush_yaml().
+_PENDING_YAML: dict[str, dict] = {}
+
+# Number of deferred_yaml() blocks currently open. Updates are only kept in
+# _PENDING_YAML while it is above zero, otherwise they are written at once.
+_YAML_DEFERRED = 0
+
+# YAML contents already parsed by read_yaml_params(), keyed by absolute file
+# path, with the (mtime_ns, size) of the file when it was read. Least
+# recently used entries are dropped past _YAML_CACHE_SIZE.
+_YAML_CACHE: OrderedDict[str, tuple[tuple[int, int], dict]] = OrderedDict()
+_YAML_CACHE_SIZE = 100
+
 
 def get_file_paths_on_cond(
     dir_path: Path, end_str: str = None, start_str: str = None
@@ -513,6 +543,9 @@ def read_yaml_params(config_file_path: str) -> dict:
     This function safely loads a YAML file, which can contain configuration
     options, settings, or any structured data in YAML format.
 
+    Parsed files are cached and reused while their modification time and
+    size do not change. Every call returns a new copy of the contents.
+
     Parameters
     ----------
     config_file_path : str
@@ -537,10 +570,29 @@ def read_yaml_params(config_file_path: str) -> dict:
     >>> print(config['database']['host'])
     'localhost'
     """
+    # Updates not yet written to disk take precedence over the file
+    pending_key = _yaml_key(config_file_path)
+    if pending_key in _PENDING_YAML:
+        return copy.deepcopy(_PENDING_YAML[pending_key])
+
     try:
+        # Reuse the parsed contents while the file is unchanged
+        file_stat = os.stat(config_file_path)
+        file_signature = (file_stat.st_mtime_ns, file_stat.st_size)
+        cached = _YAML_CACHE.get(pending_key)
+        if cached is not None and cached[0] == file_signature:
+            _YAML_CACHE.move_to_end(pending_key)
+            return copy.deepcopy(cached[1])
+
         with open(config_file_path, "r", encoding="utf-8") as config_file:
-            # Use safe_load to prevent arbitrary code execution
-            config_data = yaml.safe_load(config_file)
+            # Use a safe loader to prevent arbitrary code execution
+            config_data = yaml.load(config_file, Loader=_YamlLoader)
+
+        # Cache a copy, callers are free to modify the returned data
+        _YAML_CACHE[pending_key] = (file_signature, copy.deepcopy(config_data))
+        _YAML_CACHE.move_to_end(pending_key)
+        if len(_YAML_CACHE) > _YAML_CACHE_SIZE:
+            _YAML_CACHE.popitem(last=False)
         return config_data
     except FileNotFoundError as e:
         raise FileNotFoundError(
@@ -561,8 +613,13 @@ def update_yaml_params(
 
     This function allows for adding or updating information in any top-level section of
     the YAML file.
-    If the specified section doesn't exist, it will be created. The function also
-    updates the 'Last_modified' field in the 'Metadata' section with the current timestamp.
+    If the specified section doesn't exist, it will be created. If it already
+    holds the same data, the file is left untouched.
+
+    Inside a deferred_yaml() block, updates are kept in memory instead, so
+    consecutive calls over the same file are written with a single dump when
+    the block ends. read_yaml_params() already returns the updated contents
+    before that.
 
     Parameters
     ----------
@@ -577,16 +634,32 @@ def update_yaml_params(
     Returns
     -------
     None
-        This function doesn't return any value, but it modifies the specified YAML file in-place.
+        This function doesn't return any value, but it modifies the specified YAML file.
 
     Examples
     --------
     >>> update_yaml_params('config.yaml', 'new_entry', {'key': 'value'})
     >>> update_yaml_params('config.yaml', 'visit_1', {'date': '2023-09-26', 'doctor': 'Dr. Smith'})
     """
+    # Keep a copy, later changes to the caller's data must not be written
+    new_entry_data = copy.deepcopy(new_entry_data)
+
+    # Files with pending updates are updated in place, without copying
+    # the whole document again through read_yaml_params()
+    pending = _PENDING_YAML.get(_yaml_key(config_file_path))
+    if pending is not None:
+        pending[new_entry_key] = new_entry_data
+        return
+
     # Read existing configuration and append new one
     try:
         config_data = read_yaml_params(config_file_path)
+        # Nothing to write if the entry already holds the same data
+        if (
+            new_entry_key in config_data
+            and config_data[new_entry_key] == new_entry_data
+        ):
+            return
         config_data[new_entry_key] = new_entry_data
     except (FileNotFoundError, TypeError):
         if isinstance(new_entry_data, dict):
@@ -594,15 +667,110 @@ def update_yaml_params(
         else:
             config_data = {new_entry_key: new_entry_data}
 
-    # Write updated configuration back to file
-    with open(config_file_path, "w+", encoding="utf-8") as config_file:
-        yaml.dump(
-            config_data,
-            config_file,
-            sort_keys=False,
-            width=float("inf"),
-            default_flow_style=False,
-        )
+    # Keep it until the next flush, or write it now if not deferred
+    _PENDING_YAML[_yaml_key(config_file_path)] = config_data
+    if not _YAML_DEFERRED:
+        flush_yaml(config_file_path)
+
+
+@contextmanager
+def deferred_yaml():
+    """
+    Defer the writes of update_yaml_params() until the block ends.
+
+    Every update made inside the block is kept in memory and each modified
+    file is written once on exit, also when the block raises. Blocks can be
+    nested, files are written when the outermost one ends. Use flush_yaml()
+    to write them earlier.
+
+    Examples
+    --------
+    >>> with deferred_yaml():
+    ...     update_yaml_params('config.yaml', 'input_dir', 'data/input')
+    ...     update_yaml_params('config.yaml', 'output_dir', 'data/output')
+    """
+    global _YAML_DEFERRED
+    _YAML_DEFERRED += 1
+    try:
+        yield
+    finally:
+        _YAML_DEFERRED -= 1
+        if not _YAML_DEFERRED:
+            flush_yaml()
+
+
+def flush_yaml(config_file_path: str = None) -> None:
+    """
+    Write to disk the updates deferred with deferred_yaml().
+
+    The file is first written to a temporary file next to it and then
+    moved over the original, so readers never see a half written file.
+    The original keeps its permissions, and if it is a symlink the file
+    it points to is the one replaced.
+
+    Parameters
+    ----------
+    config_file_path : str, optional
+        Path to the YAML configuration file to write. By default None,
+        which writes every file with pending updates.
+
+    Examples
+    --------
+    >>> with deferred_yaml():
+    ...     update_yaml_params('config.yaml', 'new_entry', {'key': 'value'})
+    ...     flush_yaml('config.yaml')
+    """
+    if config_file_path is None:
+        pending_keys = list(_PENDING_YAML)
+    else:
+        pending_keys = [_yaml_key(config_file_path)]
+
+    for pending_key in pending_keys:
+        if pending_key not in _PENDING_YAML:
+            continue
+        config_data = _PENDING_YAML.pop(pending_key)
+
+        # Write updated configuration back to file
+        config_dir, config_name = os.path.split(pending_key)
+        with tempfile.NamedTemporaryFile(
+            "w",
+            encoding="utf-8",
+            dir=config_dir,
+            prefix=config_name + ".",
+            suffix=".tmp",
+            delete=False,
+        ) as config_file:
+            try:
+                yaml.dump(
+                    config_data,
+                    config_file,
+                    Dumper=_YamlDumper,
+                    sort_keys=False,
+                    width=_YAML_WIDTH,
+                    default_flow_style=False,
+                )
+            except BaseException:
+                config_file.close()
+                os.remove(config_file.name)
+                raise
+        # Keep the permissions of the file being replaced. New files get
+        # the ones open() would give them, temporary files are private.
+        if os.path.exists(pending_key):
+            shutil.copymode(pending_key, config_file.name)
+        else:
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(config_file.name, 0o666 & ~umask)
+        os.replace(config_file.name, pending_key)
+        _YAML_CACHE.pop(pending_key, None)
+
+
+def _yaml_key(config_file_path: str) -> str:
+    """Normalize a path so it can be used as key of _PENDING_YAML and _YAML_CACHE.
+
+    Symlinks are resolved, so the file they point to is the one written.
+    """
+    return os.path.realpath(os.fspath(config_file_path))
 
 
 def apply_modifications(data_dir: Path, yaml_file: str, verbose: int = 0) -> None:
@@ -2,9 +2,16 @@
 Functions to help mapping concepts to and from an OMOP-CDM instance
 """
 
+import weakref
+
 import numpy as np
 import pandas as pd
 import pyarrow as pa
+from pandas.api.types import is_scalar
+
+# Lookups built from CONCEPT and CONCEPT_RELATIONSHIP tables, keyed by
+# (id(table), ...). An entry is dropped when its table is garbage collected.
+_LOOKUP_CACHE: dict = {}
 
 
 def map_source_value(
@@ -74,37 +81,238 @@ def map_source_value(
     - The original DataFrame is not modified; a copy is returned
     - Update only the rows for each target_vocab at a time. This will
         rewrite existing mappings for the same vocabulary.
+    - The lookup for each vocabulary is built once per concept_df object
+        and reused in later calls, so concept_df should not be modified
+        in place between calls.
     """
 
     # Create a copy of the input DataFrame to store results
     result_df = df.copy()
-    result_df[concept_id_column] = np.nan
+    result_df[concept_id_column] = _source_concept_ids(
+        df, target_vocab, concept_df, source_column, vocabulary_column
+    )
+    return result_df
+
+
+def _source_concept_ids(
+    df: pd.DataFrame,
+    target_vocab: dict,
+    concept_df: pd.DataFrame,
+    source_column: str,
+    vocabulary_column: str,
+) -> pd.arrays.IntegerArray:
+    """Look up the source concept_id of every row of df.
+
+    See map_source_value for a description of the parameters.
+
+    Returns
+    -------
+    pd.arrays.IntegerArray
+        concept_id of every row, null where no concept was found.
+    """
+
+    # Encode vocabularies as integer codes once, so each vocabulary
+    # mask is an integer comparison instead of a string comparison
+    vocab_codes, vocab_names = pd.factorize(df[vocabulary_column])
+
+    # Collect the concept_id of every row as Int64 values and mask,
+    # then write the column once. Rows start as null.
+    source_values = df[source_column].to_numpy()
+    concept_ids = np.zeros(len(df), dtype="int64")
+    concept_na = np.ones(len(df), dtype=bool)
 
     # Process each vocabulary
     for vocab, target in target_vocab.items():
-        # Create masks for current vocabulary
-        df_mask = df[vocabulary_column] == vocab
-        concept_mask = concept_df["vocabulary_id"] == vocab
+        # Skip vocabularies not present in the data
+        if vocab not in vocab_names:
+            continue
+
+        # Get the rows for current vocabulary
+        rows = np.flatnonzero(vocab_codes == vocab_names.get_loc(vocab))
+
+        # Get the lookup for current vocabulary
+        concept_map = _concept_lookup(concept_df, vocab, target)
+
+        # Look up only the rows for current vocabulary
+        concept_ids[rows], found = _probe(concept_map, source_values[rows])
+        concept_na[rows] = ~found
 
-        # Get subset of data for current vocabulary
-        df_subset = df[df_mask]
-        concept_subset = concept_df[concept_mask]
+    return pd.arrays.IntegerArray(concept_ids, concept_na)
 
-        # Get unique concepts for current vocabulary
-        unique_concepts = df_subset[source_column].unique()
-        mapping_df = concept_subset[concept_subset[target].isin(unique_concepts)]
 
-        # Create mapping for current vocabulary
-        concept_map = dict(zip(mapping_df[target], mapping_df["concept_id"]))
+def _probe(
+    lookup: tuple[pd.Index, np.ndarray], values: np.ndarray, valid: np.ndarray = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """Look up values in a lookup built by _padded_lookup.
+
+    Parameters
+    ----------
+    lookup : tuple[pd.Index, np.ndarray]
+        Keys to look up and their int64 concept_id, followed by a 0.
+    values : np.ndarray
+        Keys to look up.
+    valid : np.ndarray, optional, default None
+        Boolean mask of the values to look up. The rest are not found.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        int64 concept_id of each value, 0 where not found,
+        and boolean mask of the values found.
+    """
+    keys, concept_ids = lookup
+    positions = keys.get_indexer(values)
+    if valid is not None:
+        positions[~valid] = -1
+
+    # Position -1 (not found) picks the trailing 0
+    return concept_ids[positions], positions >= 0
+
+
+def _padded_lookup(
+    keys: pd.Index, concept_ids: np.ndarray
+) -> tuple[pd.Index, np.ndarray]:
+    """Build a lookup for _probe.
+
+    The concept_ids are stored as int64 followed by a 0, so not found
+    values can be read from the same array. Built once per cached lookup
+    instead of on every probe.
+
+    Parameters
+    ----------
+    keys : pd.Index
+        Unique keys to look up.
+    concept_ids : np.ndarray
+        concept_id of each key.
+
+    Returns
+    -------
+    tuple[pd.Index, np.ndarray]
+        keys and the padded int64 concept_ids.
+    """
+    padded = np.zeros(len(keys) + 1, dtype="int64")
+    padded[:-1] = concept_ids
+    return keys, padded
+
 
-        # Update only the rows for current vocabulary
-        result_df.loc[df_mask, concept_id_column] = df_subset[source_column].map(
-            concept_map
+def _cached_lookup(table: pd.DataFrame, key: tuple, build):
+    """Return build(), computed only once per table object and key.
+
+    Parameters
+    ----------
+    table : pd.DataFrame
+        Table the lookup is built from.
+    key : tuple
+        Identifies the lookup among the ones built from the same table.
+    build : callable
+        Function with no arguments that builds the lookup.
+
+    Returns
+    -------
+    Any
+        The cached result of build().
+    """
+    cache_key = (id(table), *key)
+    try:
+        return _LOOKUP_CACHE[cache_key]
+    except KeyError:
+        pass
+
+    lookup = build()
+    _LOOKUP_CACHE[cache_key] = lookup
+    weakref.finalize(table, _LOOKUP_CACHE.pop, cache_key, None)
+    return lookup
+
+
+def _concept_lookup(
+    concept_df: pd.DataFrame, vocab: str, target: str
+) -> tuple[pd.Index, np.ndarray]:
+    """Get a lookup for _probe from the target column of a vocabulary to concept_id.
+
+    The index keeps its hash table between calls, so mapping
+    with it only probes the source values.
+
+    Parameters
+    ----------
+    concept_df : pd.DataFrame
+        CONCEPT table.
+    vocab : str
+        vocabulary_id to build the lookup for.
+    target : str
+        Column of concept_df with the values to look up,
+        'concept_name' or 'concept_code'.
+
+    Returns
+    -------
+    tuple[pd.Index, np.ndarray]
+        Lookup from target to concept_id, see _padded_lookup. When a
+        value appears more than once the last concept_id is kept.
+    """
+
+    def build():
+        vocab_codes, vocab_names = _concept_vocabularies(concept_df)
+        if vocab in vocab_names:
+            rows = np.flatnonzero(vocab_codes == vocab_names.get_loc(vocab))
+        else:
+            rows = np.array([], dtype="int64")
+
+        keys = pd.Index(concept_df[target].to_numpy()[rows])
+        keep = ~keys.duplicated(keep="last")
+        return _padded_lookup(
+            keys[keep], concept_df["concept_id"].to_numpy()[rows][keep]
         )
 
-    # Force correct datatypes
-    result_df[concept_id_column] = result_df[concept_id_column].astype(pd.Int64Dtype())
-    return result_df
+    return _cached_lookup(concept_df, ("concept", vocab, target), build)
+
+
+def _concept_vocabularies(concept_df: pd.DataFrame) -> tuple[np.ndarray, pd.Index]:
+    """Get the vocabulary_id column of a CONCEPT table as integer codes.
+
+    Built once per table, so building the lookup of each vocabulary is an
+    integer comparison instead of a string comparison over the whole table.
+
+    Parameters
+    ----------
+    concept_df : pd.DataFrame
+        CONCEPT table.
+
+    Returns
+    -------
+    tuple[np.ndarray, pd.Index]
+        Code of every row and the vocabulary_id of each code.
+    """
+    return _cached_lookup(
+        concept_df,
+        ("vocabularies",),
+        lambda: pd.factorize(concept_df["vocabulary_id"]),
+    )
+
+
+def _maps_to_lookup(concept_rel_df: pd.DataFrame) -> tuple[pd.Index, np.ndarray]:
+    """Get a lookup for _probe from concept_id_1 to concept_id_2 for 'Maps to' relationships.
+
+    Parameters
+    ----------
+    concept_rel_df : pd.DataFrame
+        CONCEPT_RELATIONSHIP table.
+
+    Returns
+    -------
+    tuple[pd.Index, np.ndarray]
+        Lookup from concept_id_1 to concept_id_2, see _padded_lookup. When
+        a concept has more than one 'Maps to' relationship the last one is kept.
+    """
+
+    def build():
+        maps_to = concept_rel_df.loc[
+            concept_rel_df["relationship_id"] == "Maps to",
+            ["concept_id_1", "concept_id_2"],
+        ].drop_duplicates("concept_id_1", keep="last")
+        return _padded_lookup(
+            pd.Index(maps_to["concept_id_1"]), maps_to["concept_id_2"].to_numpy()
+        )
+
+    return _cached_lookup(concept_rel_df, ("maps_to",), build)
 
 
 def map_source_concept_id(
@@ -144,6 +352,9 @@ def map_source_concept_id(
     - Unmapped concepts will be set to 0 in the output
     - The original DataFrame is not modified; a copy is returned
     - All concept IDs are converted to Int64 type
+    - The 'Maps to' lookup is built once per concept_rel_df object and
+        reused in later calls, so concept_rel_df should not be modified
+        in place between calls.
 
     Examples
     --------
@@ -161,32 +372,101 @@ def map_source_concept_id(
     Name: source_concept_id, dtype: Int64
     """
 
-    # Filter for 'Maps to' relationships
-    mapping_relationships = concept_rel_df[
-        concept_rel_df["relationship_id"] == "Maps to"
-    ]
-
     # Create a copy of the input DataFrame to store results
     result_df = df.copy()
 
-    # Get unique concepts
-    unique_concepts = df[source_column].unique()
-    mapping_df = mapping_relationships[
-        mapping_relationships["concept_id_1"].isin(unique_concepts)
-    ]
+    # Force correct datatypes
+    source_ids = result_df[source_column].astype(pd.Int64Dtype()).array
+    result_df[source_column] = source_ids
+
+    # Map to standard concepts
+    result_df[concept_id_column] = _standard_concept_ids(source_ids, concept_rel_df)
 
-    # Create and apply mapping for current vocabulary
-    concept_map = dict(zip(mapping_df["concept_id_1"], mapping_df["concept_id_2"]))
+    return result_df
 
-    # Update only the rows for current vocabulary
-    result_df[concept_id_column] = result_df[source_column].map(concept_map)
 
-    # Fill unmapped values (NaN) with 0
-    result_df[concept_id_column] = result_df[concept_id_column].fillna(0)
+def _standard_concept_ids(
+    source_ids: pd.arrays.IntegerArray, concept_rel_df: pd.DataFrame
+) -> pd.arrays.IntegerArray:
+    """Look up the standard concept_id of each source concept_id.
 
-    # Force correct datatypes
-    result_df[source_column] = result_df[source_column].astype(pd.Int64Dtype())
-    result_df[concept_id_column] = result_df[concept_id_column].astype(pd.Int64Dtype())
+    Parameters
+    ----------
+    source_ids : pd.arrays.IntegerArray
+        Source concept IDs.
+    concept_rel_df : pandas.DataFrame
+        CONCEPT_RELATIONSHIP table.
+
+    Returns
+    -------
+    pd.arrays.IntegerArray
+        Standard concept IDs, 0 where there is no 'Maps to' relationship.
+    """
+    # Probe the 'Maps to' lookup with plain int64 values, skipping nulls.
+    # Unmapped values are set to 0, so no value is null.
+    concept_ids, _ = _probe(
+        _maps_to_lookup(concept_rel_df),
+        source_ids.to_numpy(dtype="int64", na_value=0),
+        valid=~source_ids.isna(),
+    )
+    return pd.arrays.IntegerArray(concept_ids, np.zeros(len(concept_ids), dtype=bool))
+
+
+def map_all(
+    df: pd.DataFrame,
+    target_vocab: dict,
+    concept_df: pd.DataFrame,
+    concept_rel_df: pd.DataFrame,
+    source_column: str = "source_value",
+    vocabulary_column: str = "vocabulary_id",
+    source_concept_id_column: str = "source_concept_id",
+    concept_id_column: str = "concept_id",
+) -> pd.DataFrame:
+    """Map source values to source and standard concept IDs in one pass.
+
+    Does the same as map_source_value followed by map_source_concept_id,
+    without building the intermediate DataFrame.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Input DataFrame containing source concepts to be mapped.
+    target_vocab : dict
+        Dictionary with target vocabularies as keys and their corresponding
+        target column in CONCEPT table as values. See map_source_value.
+    concept_df : pd.DataFrame
+        CONCEPT table.
+    concept_rel_df : pd.DataFrame
+        CONCEPT_RELATIONSHIP table.
+    source_column : str, optional, default "source_value"
+        Name of the column that has the source values.
+    vocabulary_column : str, optional, default "vocabulary_id"
+        Name of the column that has the vocabulary_id values.
+    source_concept_id_column : str, optional, default "source_concept_id"
+        Name of the output column with the source concept IDs.
+    concept_id_column : str, optional, default "concept_id"
+        Name of the output column with the standard concept IDs.
+
+    Returns
+    -------
+    pd.DataFrame
+        Copy of the input DataFrame with both columns added as Int64.
+        Source concepts not found are null and standard concepts
+        not found are 0.
+
+    See Also
+    --------
+    map_source_value : Maps source values to source concept IDs.
+    map_source_concept_id : Maps source concept IDs to standard concept IDs.
+    """
+    source_ids = _source_concept_ids(
+        df, target_vocab, concept_df, source_column, vocabulary_column
+    )
+
+    # Create a copy of the input DataFrame to store results
+    result_df = df.copy()
+    result_df[source_concept_id_column] = source_ids
+    result_df[concept_id_column] = _standard_concept_ids(source_ids, concept_rel_df)
 
     return result_df
 
@@ -399,41 +679,81 @@ def fallback_mapping(
     -------
     tuple[pd.DataFrame, pd.Series]
         Modified DataFrame and boolean mask of remaining unmapped rows
+
+    Notes
+    -----
+    - Only the unmapped rows are mapped again. Rows that already have a
+        concept_id keep their vocabulary_id, source_concept_id and concept_id.
+    - Each vocabulary is only tried on the rows still unmapped by the previous
+        ones, and the results are written to the DataFrame once at the end.
+    - If any row is unmapped, a copy is returned with source_concept_id_column
+        and concept_id_column as Int64. Otherwise df is returned as is.
     """
+    # Build the lookups once, before going through the vocabularies
+    source_lookups = {
+        vocab: _concept_lookup(concept_df, vocab, target)
+        for vocab, target in fallback_vocabs.items()
+    }
+    maps_to = _maps_to_lookup(concept_rel_df)
+
+    # Identify rows that need updating (null, NaN, 0 or empty values)
+    unmapped_mask = get_unmapped_mask(df, concept_id_column).to_numpy(
+        dtype=bool, na_value=False
+    )
+    unmapped_rows = np.flatnonzero(unmapped_mask)
+    source_values = df[source_value_column].to_numpy()[unmapped_rows]
+
+    # Results for the unmapped rows, written back to df once at the end
+    n_unmapped = len(unmapped_rows)
+    vocabs = np.empty(n_unmapped, dtype=object)
+    source_concept_ids = np.zeros(n_unmapped, dtype="int64")
+    source_concept_na = np.ones(n_unmapped, dtype=bool)
+    concept_ids = np.zeros(n_unmapped, dtype="int64")
+
+    # Positions, within the unmapped rows, of the rows still unmapped
+    pending = np.arange(n_unmapped)
+
     # Iterate over fallback_vocabs
     for vocab, target in fallback_vocabs.items():
 
-        # Identify rows that need updating (null, NaN, 0 or empty values)
-        unmapped_mask = get_unmapped_mask(df, concept_id_column)
-
         # Early exit
-        if not unmapped_mask.any():
+        if not len(pending):
             break
 
         print(
-            f" {unmapped_mask.sum()} unmapped values found. Falling back to {vocab}:{target}",
+            f" {len(pending)} unmapped values found. Falling back to {vocab}:{target}",
             flush=True,
         )
 
-        # Assign them to unmapped rows
-        df.loc[unmapped_mask, vocabulary_id_column] = vocab
+        # Assign them to pending rows
+        vocabs[pending] = vocab
 
         # Try to map again to source_concept_id
-        df = map_source_value(
-            df,
-            fallback_vocabs,
-            concept_df,
-            source_value_column,
-            vocabulary_id_column,
-            source_concept_id_column,
-        )
+        source_ids, source_found = _probe(source_lookups[vocab], source_values[pending])
+        source_concept_ids[pending] = source_ids
+        source_concept_na[pending] = ~source_found
+
         # Try to map to standard concept ids
-        df = map_source_concept_id(
-            df,
-            concept_rel_df,
-            source_concept_id_column,
-            concept_id_column,
-        )
+        standard_ids, _ = _probe(maps_to, source_ids, valid=source_found)
+        concept_ids[pending] = standard_ids
+
+        # Keep only the rows that are still unmapped
+        pending = pending[standard_ids == 0]
+
+    # Write the results back to a copy of df, as nullable integers
+    if n_unmapped and fallback_vocabs:
+        df = df.copy()
+        df.loc[unmapped_mask, vocabulary_id_column] = vocabs
+        for column, values, na in (
+            (source_concept_id_column, source_concept_ids, source_concept_na),
+            (concept_id_column, concept_ids, np.zeros(n_unmapped, dtype=bool)),
+        ):
+            current = pd.to_numeric(df[column], errors="coerce").astype(pd.Int64Dtype())
+            data = current.to_numpy(dtype="int64", na_value=0, copy=True)
+            mask = current.isna().to_numpy()
+            data[unmapped_rows] = values
+            mask[unmapped_rows] = na
+            df[column] = pd.arrays.IntegerArray(data, mask)
 
     # When loop finishes, reidentify rows that need updating
     unmapped_mask = get_unmapped_mask(df, concept_id_column)
@@ -526,13 +846,17 @@ def update_concept_mappings(
     target_column : str
         Name of column where updated concept IDs will be stored
     new_concept_mappings : dict
-        Dictionary of {source_value: concept_id} pairs to update existing mappings
+        Dictionary of {source_value: concept_id} pairs to update existing mappings.
+        Null source values are never matched, and a null concept_id sets the
+        matching rows to null.
 
     Returns
     -------
     pd.DataFrame
         Copy of input DataFrame with updated concept ID mappings for unmapped values.
-        Existing non-zero mappings are preserved.
+        Existing non-zero mappings are preserved. Only target_column is copied,
+        the other columns share their data with the input DataFrame. If
+        new_concept_mappings is empty no column is copied.
 
     Raises
     ------
@@ -562,19 +886,49 @@ def update_concept_mappings(
     if target_column not in df.columns:
         raise KeyError(f"Target column '{target_column}' not found in DataFrame")
 
+    # Nothing to update, return a shallow copy
     if not new_concept_mappings:
-        return df.copy()
+        return df.copy(deep=False)
 
-    # Create a copy to avoid modifying the original
-    result_df = df.copy()
+    # Create a copy to avoid modifying the original. Only the target
+    # column is written, so it is the only one that needs its own data.
+    result_df = df.copy(deep=False)
 
     # Identify rows that need updating (null, NaN, or 0 values)
-    unmapped_mask = get_unmapped_mask(df, target_column)
+    unmapped_mask = get_unmapped_mask(df, target_column).to_numpy(
+        dtype=bool, na_value=False
+    )
 
-    # Update only the unmapped rows
-    for source_value, concept_id in new_concept_mappings.items():
-        mask = (result_df[source_column] == source_value) & unmapped_mask
-        result_df.loc[mask, target_column] = concept_id
+    # Null source values never equal a key, so null keys are left out
+    mappings = {
+        key: value
+        for key, value in new_concept_mappings.items()
+        if not (is_scalar(key) and pd.isna(key))
+    }
+    # Keys and source values are compared as python objects, so they
+    # match as they would with ==, e.g. a True key matches a 1.
+    mapping_keys = pd.Index(list(mappings), dtype=object, tupleize_cols=False)
+    mapping_values = list(mappings.values())
+
+    # Look up the new concept of every unmapped row at once
+    positions = mapping_keys.get_indexer(
+        df[source_column].to_numpy()[unmapped_mask].astype(object)
+    )
+    new_rows = np.flatnonzero(unmapped_mask)[positions >= 0]
+    positions = positions[positions >= 0]
+    if not len(new_rows):
+        return result_df
+
+    # Update only the unmapped rows that have a new mapping. Each concept
+    # id is written as a scalar, so the column checks and upcasts it as
+    # it always did, e.g. a None concept id sets the rows to null.
+    result_df[target_column] = df[target_column].copy()
+    order = np.argsort(positions, kind="stable")
+    found, starts = np.unique(positions[order], return_index=True)
+    for position, rows in zip(found, np.split(new_rows[order], starts[1:])):
+        update_mask = np.zeros(len(df), dtype=bool)
+        update_mask[rows] = True
+        result_df.loc[update_mask, target_column] = mapping_values[position]
 
     return result_df
 
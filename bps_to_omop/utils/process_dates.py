@@ -6,8 +6,17 @@ import warnings
 
 import numpy as np
 import pandas as pd
+import polars as pl
 import scipy.stats as st
 
+# Number of rows from which remove_overlap switches to polars by default
+POLARS_MIN_ROWS = 50_000
+
+
+def _is_numpy_datetime(dtype) -> bool:
+    """Tell whether dtype is a plain numpy datetime64 dtype."""
+    return isinstance(dtype, np.dtype) and pd.api.types.is_datetime64_dtype(dtype)
+
 
 def find_overlap_index(df: pd.DataFrame) -> pd.Series:
     """Finds all rows that:
@@ -29,19 +38,45 @@ def find_overlap_index(df: pd.DataFrame) -> pd.Series:
         pandas Series with bools. True if row is contained
         with the previous row, False otherwise.
     """
+    person = df.iloc[:, 0]
+    start = df.iloc[:, 1]
+    end = df.iloc[:, 2]
     # 1. Check that current and previous patient are the same
-    idx_person = df.iloc[:, 0] == df.iloc[:, 0].shift(1)
+    idx_person = (person == person.shift(1)).to_numpy(dtype=bool, na_value=False)
+
+    # Other date types, like objects holding None or timezone-aware
+    # and arrow dates, go through pandas, which knows how to compare them
+    if not (_is_numpy_datetime(start.dtype) and _is_numpy_datetime(end.dtype)):
+        # 2. Check that current start_date is later that previous start_date
+        idx_start = start >= start.shift(1)
+        # 3. Check that current end_date is sooner that previous end_date
+        idx_end = end <= end.shift(1)
+        # 4. Check that current interval and previos interval are not both single_day
+        interval = end - start
+        idx_int_curr = interval <= pd.Timedelta(1, unit="D")
+        idx_int_prev = interval.shift(1) <= pd.Timedelta(1, unit="D")
+        idx_interval = ~(idx_int_curr & idx_int_prev)
+        # 5. If everything past is true, I can drop the row
+        return idx_start & idx_end & idx_person & idx_interval
+
+    # Work over the underlying numpy arrays, they are views of the
+    # dataframe data for datetime64 columns, so no copies are made.
+    # Missing dates never match, as it happens with pandas.
+    start = start.to_numpy(copy=False)
+    end = end.to_numpy(copy=False)
     # 2. Check that current start_date is later that previous start_date
-    idx_start = df.iloc[:, 1] >= df.iloc[:, 1].shift(1)
+    idx_start = np.zeros(len(df), dtype=bool)
+    idx_start[1:] = start[1:] >= start[:-1]
     # 3. Check that current end_date is sooner that previous end_date
-    idx_end = df.iloc[:, 2] <= df.iloc[:, 2].shift(1)
+    idx_end = np.zeros(len(df), dtype=bool)
+    idx_end[1:] = end[1:] <= end[:-1]
     # 4. Check that current interval and previos interval are not both single_day
-    interval = df.iloc[:, 2] - df.iloc[:, 1]
-    idx_int_curr = interval <= pd.Timedelta(1, unit="D")
-    idx_int_prev = interval.shift(1) <= pd.Timedelta(1, unit="D")
+    idx_int_curr = (end - start) <= np.timedelta64(1, "D")
+    idx_int_prev = np.zeros(len(df), dtype=bool)
+    idx_int_prev[1:] = idx_int_curr[:-1]
     idx_interval = ~(idx_int_curr & idx_int_prev)
     # 5. If everything past is true, I can drop the row
-    return idx_start & idx_end & idx_person & idx_interval
+    return pd.Series(idx_start & idx_end & idx_person & idx_interval, index=df.index)
 
 
 def remove_overlap(
@@ -49,6 +84,7 @@ def remove_overlap(
     sorting_columns: tuple,
     ascending_order: tuple,
     verbose: int = 0,
+    backend: str = "auto",
     _counter: int = 0,
     _counter_lim: int = 1000,
 ) -> pd.DataFrame:
@@ -80,7 +116,12 @@ def remove_overlap(
         - 0 No info
         - 2 Show number of iterations
         - 3 Show an example of the first row being removed and
-            the row that contains it.
+            the row that contains it. Only with the pandas backend.
+    backend : str, optional, default "auto"
+        Library used to find the overlapping rows. Both give the same result.
+        - "pandas" Iterates with pandas.
+        - "polars" Iterates with polars, faster on large tables.
+        - "auto" Uses polars if df has more than POLARS_MIN_ROWS rows.
     _counter : int
         Iteration control param. Number of iterations.
         0 will be used to begin and function will take over.
@@ -90,7 +131,8 @@ def remove_overlap(
     Returns
     -------
     pd.DataFrame
-        Copy of input dataframe with contained rows removed.
+        Copy of input dataframe with contained rows removed, sorted
+        by sorting_columns and with a new RangeIndex.
 
     Notes
     -------
@@ -110,6 +152,8 @@ def remove_overlap(
         raise ValueError(
             "'sorting_columns' and 'ascending_order' lengths must be equal."
         )
+    if backend not in ("auto", "pandas", "polars"):
+        raise ValueError("'backend' must be one of 'auto', 'pandas' or 'polars'.")
 
     cond_sort = sorting_columns[:3] != ["person_id", "start_date", "end_date"]
     cond_asce = ascending_order[:3] != [True, True, False]
@@ -125,7 +169,18 @@ def remove_overlap(
             print("Removing overlapping rows...")
         if verbose > 1:
             print(f" Iter 0 => {df.shape[0]} initial rows.")
-        df = df.sort_values(sorting_columns, ascending=ascending_order)
+        # Sort with a single lexsort over integer keys. np.lexsort uses
+        # the last key as the primary one, so keys go in reverse order.
+        sort_keys = [
+            _sort_key(df[col], asc)
+            for col, asc in zip(sorting_columns, ascending_order)
+        ]
+        sort_order = np.lexsort(sort_keys[::-1])
+        df = df.iloc[sort_order]
+
+        # Large tables are better iterated with polars
+        if backend == "polars" or (backend == "auto" and len(df) > POLARS_MIN_ROWS):
+            return _remove_overlap_polars(df, verbose, _counter_lim)
 
     # == Find indexes ================================================
     # Get the rows
@@ -145,10 +200,104 @@ def remove_overlap(
             idx_max = df.index.get_loc(idx_to_remove.idxmax())
             print(f"{df.iloc[(idx_max-1):idx_max+1, :4]}")
         return remove_overlap(
-            df.loc[~idx_to_remove], sorting_columns, ascending_order, verbose, _counter
+            df.loc[~idx_to_remove],
+            sorting_columns,
+            ascending_order,
+            verbose,
+            backend="pandas",
+            _counter=_counter,
+            _counter_lim=_counter_lim,
         )
     else:
-        return df
+        return df.reset_index(drop=True)
+
+
+def _remove_overlap_polars(
+    df: pd.DataFrame, verbose: int = 0, counter_lim: int = 1000
+) -> pd.DataFrame:
+    """Polars version of the remove_overlap() iterations.
+
+    Applies the same conditions as find_overlap_index() until no more
+    rows are removed. Only the first three columns are moved to polars,
+    the rows kept are then selected on the original dataframe.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        pandas dataframe already sorted as remove_overlap() does.
+        Assumes first column is person_id, second column is
+        start_date and third column is end_date.
+    verbose : int, optional, default 0
+        Information output
+        - 0 No info
+        - 2 Show number of iterations
+    counter_lim : int, optional, default 1000
+        Limit of iterations
+
+    Returns
+    -------
+    pd.DataFrame
+        Copy of input dataframe with contained rows removed
+        and with a new RangeIndex.
+    """
+    # Missing values never match, as it happens in pandas
+    person = pl.col("person")
+    start = pl.col("start")
+    end = pl.col("end")
+    single_day = (end - start) <= pl.duration(days=1)
+    idx_to_remove = (
+        (person == person.shift(1)).fill_null(False)
+        & (start >= start.shift(1)).fill_null(False)
+        & (end <= end.shift(1)).fill_null(False)
+        & ~(single_day.fill_null(False) & single_day.shift(1).fill_null(False))
+    )
+
+    keys = pl.from_pandas(
+        df.iloc[:, :3].set_axis(["person", "start", "end"], axis=1)
+    ).with_row_index("row")
+    for counter in range(1, counter_lim):
+        keys = keys.with_columns(idx_to_remove.alias("remove"))
+        idx_to_remove_sum = keys["remove"].sum()
+        if idx_to_remove_sum == 0:
+            break
+        if verbose > 1:
+            # Show iteration and number of rows removed
+            print(f" Iter {counter} => {idx_to_remove_sum} rows removed.")
+        keys = keys.filter(~pl.col("remove"))
+
+    return df.iloc[keys["row"].to_numpy()].reset_index(drop=True)
+
+
+def _sort_key(col: pd.Series, ascending: bool) -> np.ndarray:
+    """Builds an int64 array that sorts in the same order as col.
+
+    Missing values are always placed at the end, as pandas does.
+
+    Parameters
+    ----------
+    col : pd.Series
+        Column to build the sorting key from.
+    ascending : bool
+        Whether the key should sort col in ascending or descending order.
+
+    Returns
+    -------
+    np.ndarray
+        int64 array to be used as key in np.lexsort.
+    """
+    missing = col.isna().to_numpy()
+    if pd.api.types.is_datetime64_dtype(col):
+        key = col.to_numpy(copy=False).view("i8")
+    elif pd.api.types.is_integer_dtype(col):
+        key = col.to_numpy(dtype="int64", na_value=0)
+    elif isinstance(col.dtype, pd.CategoricalDtype):
+        # Respects the order of the categories
+        key = col.cat.codes.to_numpy().astype("int64")
+    else:
+        # Strings and anything else are compared through their sorted codes
+        key = pd.factorize(col, sort=True)[0].astype("int64")
+
+    return np.where(missing, np.iinfo(np.int64).max, key if ascending else -key)
 
 
 def find_person_index(df: pd.DataFrame) -> tuple[pd.Series]:
@@ -232,7 +381,7 @@ def group_dates(df: pd.DataFrame, n_days: int, verbose: int = 0) -> pd.DataFrame
     # == Index look-up ============================================
     if verbose > 0:
         print("- Looking up indexes...")
-    (idx_person_first, idx_person_last, idx_person_only) = find_person_index(df_rare)
+    idx_person_first, idx_person_last, idx_person_only = find_person_index(df_rare)
     # Create index if the break is too big and needs to be kept
     next_interval = df_rare.iloc[:, 1].shift(-1) - df_rare.iloc[:, 2]
     idx_interval = next_interval >= pd.Timedelta(n_days, unit="D")
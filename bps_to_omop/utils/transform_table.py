@@ -3,7 +3,9 @@ Functions to help with common transformations to tables before
 incorporating them to an OMOP-CDM instance.
 """
 
+import numpy as np
 import pyarrow as pa
+import pyarrow.compute as pc
 
 
 # -- Main function --
@@ -50,25 +52,48 @@ def melt_start_end(table: pa.Table) -> pa.Table:
     end_date, but rather specific events at the begining and the end.
     Before proceeding, we want to separate this columns in two independent
     events."""
-    df_raw = table.to_pandas()
-    # nos quedamos solo con las columnas que queremos
-    df_clean = df_raw[["person_id", "start_date", "end_date"]]
-    # Hacemos un melt para pasar de dataframe ancho a largo
-    df_melt = df_clean.melt(id_vars=["person_id"], value_name="fecha")
-    # Eliminamos las columnas sobrantes y quitamos los nan
-    df_melt = df_melt[["person_id", "fecha"]]
-    df_melt = df_melt.dropna()
-    # Reasignamos la nueva columna fecha al principio y al final
-    df_melt["start_date"] = df_melt["fecha"]
-    df_melt["end_date"] = df_melt["fecha"]
-    # Añadimos el type_concept
-    df_melt["type_concept"] = df_raw["type_concept"][0]
-    # Nos quedamos sólo con lo que queremos una vez más
-    df_melt = df_melt[["person_id", "start_date", "end_date", "type_concept"]]
-    # Quitamos duplicados, que puede ver
-    df_melt = df_melt.drop_duplicates(ignore_index=True)
-    # Pasamos a pyarrow table y devolvemos
-    return pa.Table.from_pandas(df_melt, preserve_index=False)
+    # Stack the end dates under the start dates, each one as an event
+    event_date = pa.chunked_array(
+        table["start_date"].chunks
+        + table["end_date"].cast(table["start_date"].type).chunks,
+        type=table["start_date"].type,
+    )
+    person_id = pa.chunked_array(
+        table["person_id"].chunks * 2, type=table["person_id"].type
+    )
+    # Drop the events without person or date
+    valid = pc.and_(pc.is_valid(person_id), pc.is_valid(event_date))
+    person_id = person_id.filter(valid)
+    event_date = event_date.filter(valid)
+
+    # Drop repeated events, keeping the first one
+    events = pa.table(
+        {
+            "person_id": person_id,
+            "event_date": event_date,
+            "row": pa.array(np.arange(len(person_id))),
+        }
+    )
+    first_rows = (
+        events.group_by(["person_id", "event_date"])
+        .aggregate([("row", "min")])
+        .column("row_min")
+    )
+    first_rows = np.sort(first_rows.to_numpy())
+    person_id = person_id.take(first_rows)
+    event_date = event_date.take(first_rows)
+
+    # Every event gets the type_concept of the first row
+    type_concept = table["type_concept"].take(np.zeros(len(first_rows), dtype=np.int64))
+
+    return pa.table(
+        {
+            "person_id": person_id,
+            "start_date": event_date,
+            "end_date": event_date,
+            "type_concept": type_concept,
+        }
+    )
 
 
 def remove_end_date(table: pa.Table) -> pa.Table:
@@ -0,0 +1,195 @@
+import pyarrow as pa
+import pytest
+
+from bps_to_omop.omop_schemas import omop_schemas
+from tests.helpers import write_parquet
+
+# OMOP schemas of the vocabulary fixtures, restricted to the columns they use
+CONCEPT_SCHEMA = pa.schema(
+    [
+        omop_schemas["CONCEPT"].field(name)
+        for name in [
+            "concept_id",
+            "concept_name",
+            "domain_id",
+            "vocabulary_id",
+            "standard_concept",
+            "concept_code",
+        ]
+    ]
+)
+CONCEPT_RELATIONSHIP_SCHEMA = pa.schema(
+    [
+        omop_schemas["CONCEPT_RELATIONSHIP"].field(name)
+        for name in ["concept_id_1", "concept_id_2", "relationship_id"]
+    ]
+)
+CLC_SCHEMA = pa.schema([("NombreConvCLC", pa.string()), ("UnidadConv", pa.string())])
+
+
+# == Hooks ============================================================
+def pytest_addoption(parser):
+    parser.addoption(
+        "--run-benchmarks",
+        action="store_true",
+        default=False,
+        help="Run the tests marked as benchmark.",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip benchmarks at collection time, before any fixture is built."""
+    if config.getoption("--run-benchmarks"):
+        return
+    skip_benchmark = pytest.mark.skip(reason="Run with --run-benchmarks")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip_benchmark)
+
+
+# == Vocabulary fixtures ==============================================
+@pytest.fixture(scope="session")
+def vocab_dir(tmp_path_factory):
+    """Create a session directory for the shared vocabulary tables."""
+    return tmp_path_factory.mktemp("vocab")
+
+
+@pytest.fixture(scope="session")
+def sample_concept_table(vocab_dir):
+    """Create a non-exhaustive sample CONCEPT table file.
+
+    There are two items for 'Hepatitis C virus measurement' because one is
+    deprecated and we need to test if it picks the correct one.
+    """
+    table = pa.table(
+        {
+            "concept_id": [
+                2000001144,
+                2000001147,
+                2000001494,
+                4092846,
+                40627284,
+                9189,
+                9191,
+                8713,
+                8848,
+            ],
+            "concept_name": [
+                "Hemoglobina",
+                "Plaquetas (recuento)",
+                "Albúmina",
+                "Hepatitis C virus measurement",
+                "Hepatitis C virus measurement",
+                "Negative",
+                "Positive",
+                "gram per deciliter",
+                "thousand per microliter",
+            ],
+            "domain_id": [
+                "Measurement",
+                "Measurement",
+                "Measurement",
+                "Measurement",
+                "Measurement",
+                "Meas Value",
+                "Meas Value",
+                "Unit",
+                "Unit",
+            ],
+            "vocabulary_id": [
+                "CLC",
+                "CLC",
+                "CLC",
+                "SNOMED",
+                "SNOMED",
+                "SNOMED",
+                "SNOMED",
+                "UCUM",
+                "UCUM",
+            ],
+            "standard_concept": [None, None, None, "S", None, "S", "S", "S", "S"],
+            "concept_code": [
+                "CLC00195",
+                "CLC00198",
+                "CLC00606",
+                "187033005",
+                "77958005",
+                "260385009",
+                "10828004",
+                "g/dL",
+                "10*3/uL",
+            ],
+        },
+        schema=CONCEPT_SCHEMA,
+    )
+
+    file_path = vocab_dir / "CONCEPT.parquet"
+    write_parquet(table, file_path)
+    return file_path
+
+
+@pytest.fixture(scope="session")
+def sample_concept_relationship_table(vocab_dir):
+    """
+    Create a non-exhaustive sample CONCEPT_RELATIONSHIP table file.
+    """
+    table = pa.table(
+        {
+            "concept_id_1": [
+                2000001144,
+                2000001147,
+                2000001494,
+                4092846,
+                40627284,
+                9189,
+                9191,
+                8713,
+                8848,
+            ],
+            "concept_id_2": [
+                3000963,
+                3024929,
+                3024561,
+                4092846,
+                4092846,
+                9189,
+                9191,
+                8713,
+                8848,
+            ],
+            "relationship_id": [
+                "Maps to",
+                "Maps to",
+                "Maps to",
+                "Maps to",
+                "Maps to",
+                "Maps to",
+                "Maps to",
+                "Maps to",
+                "Maps to",
+            ],
+        },
+        schema=CONCEPT_RELATIONSHIP_SCHEMA,
+    )
+
+    file_path = vocab_dir / "CONCEPT_RELATIONSHIP.parquet"
+    write_parquet(table, file_path)
+    return file_path
+
+
+@pytest.fixture(scope="session")
+def sample_clc_table(vocab_dir):
+    """
+    Create a non-exhaustive sample CLC-BPS vocabulary table file.
+    """
+    table = pa.table(
+        {
+            "NombreConvCLC": ["Hemoglobina", "Plaquetas (recuento)", "Albúmina"],
+            "UnidadConv": ["g/dL", "x 10^3/µL", "g/dL"],
+        },
+        schema=CLC_SCHEMA,
+    )
+
+    file_path = vocab_dir / "CLC.parquet"
+    write_parquet(table, file_path)
+    return file_path
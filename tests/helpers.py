@@ -0,0 +1,78 @@
+"""Helpers shared by the tests, imported directly by the test modules."""
+
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as parquet
+
+
+def to_date(dates):
+    """Parse the ISO dates used in the tests.
+
+    Giving the format skips pandas' format inference and the
+    cache reuses the result of repeated strings.
+    """
+    return pd.to_datetime(dates, format="%Y-%m-%d", cache=True)
+
+
+def assert_equal_relaxed(left, right):
+    """assert_frame_equal that skips the dtype and index type checks.
+
+    For tests that only care about the values, not the dtypes.
+    """
+    pd.testing.assert_frame_equal(
+        left, right, check_dtype=False, check_index_type=False
+    )
+
+
+def assert_tables_equal(left, right):
+    """Assert two Arrow tables are equal, checking the cheap things first.
+
+    The same object is equal by definition, and a different schema or
+    row count fails without comparing any buffers.
+    """
+    if left is right:
+        return
+    assert left.schema.equals(right.schema), f"{left.schema}\n!=\n{right.schema}"
+    assert left.num_rows == right.num_rows, f"{left.num_rows} != {right.num_rows}"
+    assert left.equals(right)
+
+
+def write_parquet(data, file_path):
+    """Write the small parquet files used as test inputs.
+
+    Takes either a pd.DataFrame or a pa.Table.
+
+    Compression, statistics and dictionary encoding only cost time
+    on tables of a few rows, so they are turned off.
+    """
+    if isinstance(data, pd.DataFrame):
+        data = pa.Table.from_pandas(data)
+    parquet.write_table(
+        data,
+        file_path,
+        compression="none",
+        write_statistics=False,
+        use_dictionary=False,
+    )
+
+
+def stage_files(src_dir, dst_dir):
+    """Stage the files in a session cache into a test directory.
+
+    Files are hard linked, which costs no copy. The code under test
+    only reads its inputs, so the cached files are never modified.
+    Falls back to a copy where links are not possible, e.g. across
+    devices.
+    """
+    for file_path in src_dir.rglob("*"):
+        if not file_path.is_file():
+            continue
+        dst_path = dst_dir / file_path.relative_to(src_dir)
+        dst_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(file_path, dst_path)
+        except OSError:
+            shutil.copyfile(file_path, dst_path)
@@ -1,5 +1,3 @@
-import sys
-
 import numpy as np
 import pyarrow as pa
 import pyarrow.compute as pc
@@ -7,7 +5,6 @@ import pytest
 from hypothesis import assume, given
 from hypothesis import strategies as st
 
-sys.path.append("../bps_to_omop/")
 from bps_to_omop.utils.pyarrow_utils import create_uniform_int_array
 
 
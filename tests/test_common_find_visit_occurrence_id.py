@@ -1,12 +1,10 @@
-import sys
 from datetime import datetime, timedelta
 
 import numpy as np
 import pandas as pd
 import pytest
-from utils.common import find_visit_occurrence_id
 
-sys.path.append("../bps_to_omop/")
+from bps_to_omop.utils.common import find_visit_occurrence_id
 
 
 # == TESTS =============================================================================
@@ -1,12 +1,13 @@
-import sys
-
 import pyarrow as pa
 import pytest
 from pandas import to_datetime
 from pandas.testing import assert_frame_equal
 
-sys.path.append("../bps_to_omop/")
-from utils.format_to_omop import fill_omop_table, format_table, reorder_omop_table
+from bps_to_omop.utils.format_to_omop import (
+    fill_omop_table,
+    format_table,
+    reorder_omop_table,
+)
 
 
 # == Fixtures =========================================================
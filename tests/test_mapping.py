@@ -1,13 +1,34 @@
 import numpy as np
 import pandas as pd
 import pytest
-from utils.map_to_omop import (
+
+from bps_to_omop.utils.map_to_omop import (
+    map_all,
     map_source_concept_id,
     map_source_value,
     update_concept_mappings,
 )
 
 
+def _assert_equal_fast(expected, actual):
+    """Column-wise equality check on the underlying arrays.
+
+    As strict as ``pd.testing.assert_frame_equal`` on column order, index,
+    dtypes and missing values, but skips its per-call metadata overhead.
+    """
+    assert list(expected.columns) == list(actual.columns)
+    assert expected.index.equals(actual.index)
+    for column in expected.columns:
+        expected_col, actual_col = expected[column], actual[column]
+        assert expected_col.dtype == actual_col.dtype, column
+        expected_na = expected_col.isna().to_numpy()
+        actual_na = actual_col.isna().to_numpy()
+        assert np.array_equal(expected_na, actual_na), column
+        assert np.array_equal(
+            expected_col.to_numpy()[~expected_na], actual_col.to_numpy()[~actual_na]
+        ), column
+
+
 def test_map_source_value_by_concept_code():
     """
     Test if mapping by concept_code works.
@@ -50,7 +71,7 @@ def test_map_source_value_by_concept_code():
 
     df_out = map_source_value(df_input, target_vocab, concept_df)
 
-    pd.testing.assert_frame_equal(df_output, df_out)
+    _assert_equal_fast(df_output, df_out)
 
 
 def test_map_source_value_by_concept_name():
@@ -101,7 +122,7 @@ def test_map_source_value_by_concept_name():
 
     df_out = map_source_value(df_input, target_vocab, concept_df)
 
-    pd.testing.assert_frame_equal(df_output, df_out)
+    _assert_equal_fast(df_output, df_out)
 
 
 def test_map_source_value_multiple_target_vocab():
@@ -148,7 +169,43 @@ def test_map_source_value_multiple_target_vocab():
 
     df_out = map_source_value(df_input, target_vocab, concept_df)
 
-    pd.testing.assert_frame_equal(df_output, df_out)
+    _assert_equal_fast(df_output, df_out)
+
+
+def test_map_source_value_reuses_lookup():
+    """
+    Test repeated calls against the same concept table give the same result,
+    and that a different concept table is not served from the cached lookup.
+    """
+    df_input = pd.DataFrame(
+        {
+            "vocabulary_id": ["CLC", "CLC"],
+            "source_value": ["CLC00229", "CLC00230"],
+        }
+    )
+    target_vocab = {"CLC": "concept_code"}
+    concept_df = pd.DataFrame(
+        {
+            "concept_id": [2000001178],
+            "vocabulary_id": ["CLC"],
+            "concept_code": ["CLC00229"],
+        }
+    )
+    other_concept_df = pd.DataFrame(
+        {
+            "concept_id": [2000001179],
+            "vocabulary_id": ["CLC"],
+            "concept_code": ["CLC00230"],
+        }
+    )
+
+    df_out_1 = map_source_value(df_input, target_vocab, concept_df)
+    df_out_2 = map_source_value(df_input, target_vocab, concept_df)
+    df_out_3 = map_source_value(df_input, target_vocab, other_concept_df)
+
+    _assert_equal_fast(df_out_1, df_out_2)
+    assert df_out_1["source_concept_id"].tolist() == [2000001178, pd.NA]
+    assert df_out_3["source_concept_id"].tolist() == [pd.NA, 2000001179]
 
 
 def test_map_source_concept_id():
@@ -189,7 +246,66 @@ def test_map_source_concept_id():
 
     df_out = map_source_concept_id(df_input, concept_rel_df)
 
-    pd.testing.assert_frame_equal(df_output, df_out)
+    _assert_equal_fast(df_output, df_out)
+
+
+def test_map_all():
+    """
+    Test map_all gives the same result as map_source_value followed by
+    map_source_concept_id.
+    The first one maps to a standard concept, the second one has a source
+    concept without 'Maps to' and the third one has no source concept.
+    """
+
+    # Define the table that hold the values to be mapped
+    df_input = pd.DataFrame(
+        {
+            "vocabulary_id": ["SNOMED", "CLC", "CLC"],
+            "source_value": ["187033005", "CLC00229", "CLC999"],
+        }
+    )
+
+    # Define the columns to which each vocabulary should be mapped to
+    target_vocab = {
+        "CLC": "concept_code",
+        "SNOMED": "concept_code",
+    }
+
+    # Define the concept table
+    concept_df = pd.DataFrame(
+        {
+            "concept_id": [4092846, 2000001178],
+            "vocabulary_id": ["SNOMED", "CLC"],
+            "concept_code": ["187033005", "CLC00229"],
+        }
+    )
+
+    # Define the concept relationship table
+    concept_rel_df = pd.DataFrame(
+        {
+            "concept_id_1": [4092846, 2000001178],
+            "relationship_id": ["Maps to", "Is a"],
+            "concept_id_2": [4092846, 4092846],
+        }
+    )
+
+    # Define what should be the output
+    df_output = pd.DataFrame(
+        {
+            "vocabulary_id": ["SNOMED", "CLC", "CLC"],
+            "source_value": ["187033005", "CLC00229", "CLC999"],
+            "source_concept_id": [4092846, 2000001178, None],
+            "concept_id": [4092846, 0, 0],
+        }
+    ).astype({"source_concept_id": pd.Int64Dtype(), "concept_id": pd.Int64Dtype()})
+
+    df_out = map_all(df_input, target_vocab, concept_df, concept_rel_df)
+    df_chained = map_source_concept_id(
+        map_source_value(df_input, target_vocab, concept_df), concept_rel_df
+    )
+
+    _assert_equal_fast(df_output, df_out)
+    _assert_equal_fast(df_chained, df_out)
 
 
 def test_update_concept_mappings_no_update():
@@ -212,7 +328,7 @@ def test_update_concept_mappings_no_update():
         {},
     ).astype({"concept_id": pd.Int64Dtype()})
 
-    pd.testing.assert_frame_equal(df_input, df_out)
+    _assert_equal_fast(df_input, df_out)
     assert df_input is not df_out  # Ensure it's a copy
 
 
@@ -237,7 +353,7 @@ def test_update_concept_mappings_basic_update():
     result = update_concept_mappings(
         df_input, "source_value", "concept_id", new_mappings
     )
-    pd.testing.assert_frame_equal(result, df_out)
+    _assert_equal_fast(result, df_out)
 
 
 def test_update_concept_mappings_with_nan():
@@ -261,7 +377,7 @@ def test_update_concept_mappings_with_nan():
     result = update_concept_mappings(
         df_input, "source_value", "concept_id", new_mappings
     )
-    pd.testing.assert_frame_equal(result, df_out)
+    _assert_equal_fast(result, df_out)
 
 
 def test_update_concept_mappings_with_none():
@@ -285,7 +401,7 @@ def test_update_concept_mappings_with_none():
     result = update_concept_mappings(
         df_input, "source_value", "concept_id", new_mappings
     )
-    pd.testing.assert_frame_equal(result, df_out)
+    _assert_equal_fast(result, df_out)
 
 
 def test_update_concept_mappings_empty_strings():
@@ -309,7 +425,7 @@ def test_update_concept_mappings_empty_strings():
     result = update_concept_mappings(
         df_input, "source_value", "concept_id", new_mappings
     ).astype({"concept_id": pd.Int64Dtype()})
-    pd.testing.assert_frame_equal(result, df_out)
+    _assert_equal_fast(result, df_out)
 
 
 def test_update_concept_mappings_duplicate_mappings():
@@ -344,7 +460,7 @@ def test_update_concept_mappings_duplicate_mappings():
         new_mappings,
     ).astype({"concept_id": pd.Int64Dtype()})
 
-    pd.testing.assert_frame_equal(df_output, df_out)
+    _assert_equal_fast(df_output, df_out)
 
 
 def test_update_concept_mappings_partial_mapping():
@@ -368,7 +484,31 @@ def test_update_concept_mappings_partial_mapping():
     result = update_concept_mappings(
         df_input, "source_value", "concept_id", new_mappings
     )
-    pd.testing.assert_frame_equal(result, df_out)
+    _assert_equal_fast(result, df_out)
+
+
+def test_update_concept_mappings_many_mappings():
+    """Test a mapping with more keys than rows to update."""
+    df_input = pd.DataFrame(
+        {
+            "source_value": ["A1", "B2", "C3", "D4", "E5", "F6"],
+            "concept_id": [123, 0, 0, None, 0, 0],
+        }
+    ).astype({"concept_id": pd.Int64Dtype()})
+
+    new_mappings = {"A1": 1, "B2": 2, "C3": 3, "D4": 4, "E5": 5, "X1": 6, "Y2": 7}
+
+    df_out = pd.DataFrame(
+        {
+            "source_value": ["A1", "B2", "C3", "D4", "E5", "F6"],
+            "concept_id": [123, 2, 3, 4, 5, 0],
+        }
+    ).astype({"concept_id": pd.Int64Dtype()})
+
+    result = update_concept_mappings(
+        df_input, "source_value", "concept_id", new_mappings
+    )
+    _assert_equal_fast(result, df_out)
 
 
 def test_update_concept_mappings_no_matching_values():
@@ -387,7 +527,127 @@ def test_update_concept_mappings_no_matching_values():
     result = update_concept_mappings(
         df_input, "source_value", "concept_id", new_mappings
     )
-    pd.testing.assert_frame_equal(result, df_out)
+    _assert_equal_fast(result, df_out)
+
+
+def test_update_concept_mappings_null_key():
+    """Test a null key does not match missing source values."""
+    df_input = pd.DataFrame(
+        {
+            "source_value": ["A1", None, np.nan],
+            "concept_id": [0, 0, 0],
+        }
+    ).astype({"concept_id": pd.Int64Dtype()})
+
+    new_mappings = {None: 999, np.nan: 888, "A1": 123}
+
+    df_out = pd.DataFrame(
+        {
+            "source_value": ["A1", None, np.nan],
+            "concept_id": [123, 0, 0],
+        }
+    ).astype({"concept_id": pd.Int64Dtype()})
+
+    result = update_concept_mappings(
+        df_input, "source_value", "concept_id", new_mappings
+    )
+    _assert_equal_fast(result, df_out)
+
+
+def test_update_concept_mappings_null_key_numeric_source():
+    """Test a null key does not match the NaN of a numeric source column."""
+    df_input = pd.DataFrame(
+        {
+            "source_value": [1.0, np.nan, 3.0],
+            "concept_id": [0, 0, 0],
+        }
+    )
+
+    new_mappings = {np.nan: 999, 3.0: 789}
+
+    df_out = pd.DataFrame(
+        {
+            "source_value": [1.0, np.nan, 3.0],
+            "concept_id": [0, 0, 789],
+        }
+    )
+
+    result = update_concept_mappings(
+        df_input, "source_value", "concept_id", new_mappings
+    )
+    _assert_equal_fast(result, df_out)
+
+
+def test_update_concept_mappings_bool_key():
+    """Test bool keys and source values match the integers they equal."""
+    df_input = pd.DataFrame(
+        {
+            "source_value": [1, 0, 2, True],
+            "concept_id": [0, 0, 0, 0],
+        }
+    )
+
+    new_mappings = {True: 123, 0: 456}
+
+    df_out = pd.DataFrame(
+        {
+            "source_value": [1, 0, 2, True],
+            "concept_id": [123, 456, 0, 123],
+        }
+    )
+
+    result = update_concept_mappings(
+        df_input, "source_value", "concept_id", new_mappings
+    )
+    _assert_equal_fast(result, df_out)
+
+
+def test_update_concept_mappings_string_key():
+    """Test string keys do not match the numbers they spell."""
+    df_input = pd.DataFrame(
+        {
+            "source_value": [1, 2, 3],
+            "concept_id": [0, 0, 0],
+        }
+    )
+
+    new_mappings = {"1": 123, 2: 456}
+
+    df_out = pd.DataFrame(
+        {
+            "source_value": [1, 2, 3],
+            "concept_id": [0, 456, 0],
+        }
+    )
+
+    result = update_concept_mappings(
+        df_input, "source_value", "concept_id", new_mappings
+    )
+    _assert_equal_fast(result, df_out)
+
+
+def test_update_concept_mappings_null_concept():
+    """Test a mapping to None sets the rows to null."""
+    df_input = pd.DataFrame(
+        {
+            "source_value": ["A1", "B2", "C3"],
+            "concept_id": [123, 0, 0],
+        }
+    ).astype({"concept_id": pd.Int64Dtype()})
+
+    new_mappings = {"B2": None, "C3": 789}
+
+    df_out = pd.DataFrame(
+        {
+            "source_value": ["A1", "B2", "C3"],
+            "concept_id": [123, None, 789],
+        }
+    ).astype({"concept_id": pd.Int64Dtype()})
+
+    result = update_concept_mappings(
+        df_input, "source_value", "concept_id", new_mappings
+    )
+    _assert_equal_fast(result, df_out)
 
 
 def test_update_concept_mappings_different_data_types():
@@ -411,7 +671,49 @@ def test_update_concept_mappings_different_data_types():
     result = update_concept_mappings(
         df_input, "source_value", "concept_id", new_mappings
     )
-    pd.testing.assert_frame_equal(result, df_out)
+    _assert_equal_fast(result, df_out)
+
+
+def test_update_concept_mappings_keeps_int64():
+    """Test a nullable integer target column keeps its Int64 dtype."""
+    df_input = pd.DataFrame(
+        {
+            "source_value": ["A1", "B2", "C3", "D4"],
+            "concept_id": [123, None, 0, None],
+        }
+    ).astype({"concept_id": pd.Int64Dtype()})
+
+    new_mappings = {"B2": 456, "C3": 789}
+
+    df_out = pd.DataFrame(
+        {
+            "source_value": ["A1", "B2", "C3", "D4"],
+            "concept_id": [123, 456, 789, None],
+        }
+    ).astype({"concept_id": pd.Int64Dtype()})
+
+    result = update_concept_mappings(
+        df_input, "source_value", "concept_id", new_mappings
+    )
+    _assert_equal_fast(result, df_out)
+
+
+def test_update_concept_mappings_input_not_modified():
+    """Test the input DataFrame is left untouched."""
+    df_input = pd.DataFrame(
+        {
+            "source_value": ["A1", "B2", "C3"],
+            "concept_id": [123, 0, 0],
+        }
+    )
+    df_before = df_input.copy()
+
+    result = update_concept_mappings(
+        df_input, "source_value", "concept_id", {"B2": 456}
+    )
+
+    _assert_equal_fast(df_input, df_before)
+    assert result["concept_id"].tolist() == [123, 456, 0]
 
 
 # ============================================================================
@@ -445,6 +747,22 @@ def test_update_concept_mappings_missing_target_column():
         update_concept_mappings(df_input, "source_value", "missing_col", {"A1": 999})
 
 
+@pytest.mark.parametrize("concept_id", ["456", True])
+def test_update_concept_mappings_invalid_int64_concept(concept_id):
+    """Test quoted and boolean concept ids are rejected by an Int64 column."""
+    df_input = pd.DataFrame(
+        {
+            "source_value": ["A1", "B2"],
+            "concept_id": [123, 0],
+        }
+    ).astype({"concept_id": pd.Int64Dtype()})
+
+    with pytest.raises(TypeError):
+        update_concept_mappings(
+            df_input, "source_value", "concept_id", {"B2": concept_id}
+        )
+
+
 def test_update_concept_mappings_empty_dataframe():
     """Test function raises ValueError for empty DataFrame."""
     df_input = pd.DataFrame()
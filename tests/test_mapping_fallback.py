@@ -184,3 +184,46 @@ def test_handles_different_unmapped_value_types(sample_dataframes):
 
     # Check
     pd.testing.assert_frame_equal(df_output, expected_output, check_dtype=False)
+
+
+def test_mapped_rows_are_kept(sample_dataframes):
+    """Test that rows already mapped with other vocabularies are left as they are."""
+    concept_df, concept_rel_df = sample_dataframes
+    fallback_vocabs = {"ICD10CM": "concept_code", "ICD9CM": "concept_code"}
+
+    # Define input
+    columns = [
+        "source_value",
+        "vocabulary_id",
+        "source_concept_id",
+        "concept_id",
+    ]
+    rows = [
+        ("59621000", "SNOMED", 320128, 320128),  # Not a fallback vocab, mapped
+        ("401.9", "ICD10CM", np.nan, 0),  # Wrong vocab, does it update?
+    ]
+    df_input = pd.DataFrame.from_records(rows, columns=columns)
+
+    # Define expected output
+    rows = [
+        ("59621000", "SNOMED", 320128, 320128),
+        ("401.9", "ICD9CM", 35207668, 320128),
+    ]
+    expected_output = pd.DataFrame.from_records(rows, columns=columns).astype(
+        {"source_concept_id": pd.Int64Dtype(), "concept_id": pd.Int64Dtype()}
+    )
+
+    # Apply the function
+    df_output, unmapped_mask = map_to_omop.fallback_mapping(
+        df_input,
+        concept_df,
+        concept_rel_df,
+        fallback_vocabs,
+        "source_value",
+        "source_concept_id",
+        "concept_id",
+    )
+
+    # Check
+    pd.testing.assert_frame_equal(df_output, expected_output)
+    assert not unmapped_mask.any()
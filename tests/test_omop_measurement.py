@@ -1,28 +1,132 @@
 import os
 import pathlib
+import shutil
+from dataclasses import dataclass
+from datetime import datetime
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as parquet
 import pytest
-import utils.extract as ext
 import yaml
 
 import bps_to_omop.measurement as mea
+import bps_to_omop.utils.extract as ext
 from bps_to_omop.omop_schemas import omop_schemas
+from tests.helpers import stage_files, write_parquet
+
+# OMOP schema of the visit fixture, restricted to the columns it uses
+VISIT_OCCURRENCE_SCHEMA = pa.schema(
+    [
+        omop_schemas["VISIT_OCCURRENCE"].field(name)
+        for name in [
+            "visit_occurrence_id",
+            "person_id",
+            "visit_start_datetime",
+            "visit_end_datetime",
+            "visit_type_concept_id",
+        ]
+    ]
+)
+
+# Expected MEASUREMENT rows, sorted by person_id and measurement_concept_id.
+# unit_concept_id depends on the scenario.
+EXPECTED_COLUMNS = {
+    "person_id": np.array([1, 1, 1, 2, 2], dtype=np.int64),
+    "measurement_concept_id": np.array(
+        [3000963, 3024929, 4092846, 3024561, 4092846], dtype=np.int64
+    ),
+    "value_as_number": np.array([11.0, 22.0, np.nan, 33.0, np.nan]),
+    "value_as_concept_id": np.array([np.nan, np.nan, 9189, np.nan, 9191]),
+}
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """A run of the measurement pipeline over the sample files.
+
+    params override the ones in sample_params, and unit_concept_id is
+    the expected output for that run.
+    """
+
+    params: dict
+    unit_concept_id: np.ndarray
+
+
+SCENARIOS = [
+    pytest.param(
+        Scenario(
+            params={"unmapped_unit": {"x 10^3/µL": 8848}},
+            unit_concept_id=np.array([8713, 8848, np.nan, 8713, np.nan]),
+        ),
+        id="custom_unit",
+    ),
+    # Units with no custom concept are left unmapped
+    pytest.param(
+        Scenario(
+            params={"unmapped_unit": {}},
+            unit_concept_id=np.array([8713, 0, np.nan, 8713, np.nan]),
+        ),
+        id="no_custom_unit",
+    ),
+]
+
+
+@pytest.fixture(scope="session")
+def cache_dir(tmp_path_factory):
+    """Create a session directory where the input files are written once."""
+    cache_dir = tmp_path_factory.mktemp("measurement")
+    for folder in ["input", "vocab", "visit"]:
+        (cache_dir / folder).mkdir()
+    return cache_dir
+
+
+@pytest.fixture(scope="session")
+def cached_files(
+    cache_dir,
+    sample_params,
+    sample_measurement_values,
+    sample_measurement_categorical,
+    sample_visit_table,
+    sample_concept_table,
+    sample_concept_relationship_table,
+    sample_clc_table,
+):
+    """Session directory holding every input file of the tests.
+
+    The vocabulary tables shared through conftest are copied into its
+    vocab folder.
+    """
+    for file_path in [
+        sample_concept_table,
+        sample_concept_relationship_table,
+        sample_clc_table,
+    ]:
+        shutil.copyfile(file_path, cache_dir / "vocab" / file_path.name)
+    return cache_dir
 
 
 @pytest.fixture
-def test_data_dir(tmp_path):
-    """Create a temporary directory structure for testing."""
-    for folder in ["input", "output", "vocab", "visit"]:
-        foder_dir = tmp_path / folder
-        foder_dir.mkdir()
+def test_data_dir(tmp_path, cached_files):
+    """Create a temporary directory structure for testing.
+
+    The input files are linked from the session cache instead of being
+    written again for every test.
+    """
+    # input, vocab and visit are created when their files are staged
+    stage_files(cached_files, tmp_path)
+    (tmp_path / "output").mkdir()
     return tmp_path
 
 
-@pytest.fixture
-def sample_params(test_data_dir):
-    """Create a sample parameters file."""
+@pytest.fixture(scope="session")
+def sample_params(cache_dir):
+    """Create a sample parameters file.
+
+    Returns the path of the file and the parameters it holds, so tests
+    that only need the parameters do not parse the file again.
+    """
     params = {
         "input_dir": "input",
         "output_dir": "output",
@@ -51,15 +155,15 @@ def sample_params(test_data_dir):
         "unmapped_unit": {"x 10^3/µL": 8848},
     }
 
-    params_file = test_data_dir / "test_params.yaml"
+    params_file = cache_dir / "test_params.yaml"
     with open(params_file, "w", encoding="utf-8") as f:
-        yaml.dump(params, f)
+        yaml.safe_dump(params, f, sort_keys=False)
 
-    return params_file
+    return params_file, params
 
 
-@pytest.fixture
-def sample_measurement_values(test_data_dir):
+@pytest.fixture(scope="session")
+def sample_measurement_values(cache_dir):
     """Create sample input parquet file with numeric values."""
     df = pd.DataFrame(
         {
@@ -72,13 +176,13 @@ def sample_measurement_values(test_data_dir):
         }
     )
 
-    file_path = test_data_dir / "input" / "measurement_values.parquet"
-    df.to_parquet(file_path)
+    file_path = cache_dir / "input" / "measurement_values.parquet"
+    write_parquet(df, file_path)
     return file_path
 
 
-@pytest.fixture
-def sample_measurement_categorical(test_data_dir):
+@pytest.fixture(scope="session")
+def sample_measurement_categorical(cache_dir):
     """Create sample input parquet file with categorical data."""
     df = pd.DataFrame(
         {
@@ -96,157 +200,34 @@ def sample_measurement_categorical(test_data_dir):
         }
     )
 
-    file_path = test_data_dir / "input" / "measurement_categorical.parquet"
-    df.to_parquet(file_path)
+    file_path = cache_dir / "input" / "measurement_categorical.parquet"
+    write_parquet(df, file_path)
     return file_path
 
 
-@pytest.fixture
-def sample_visit_table(test_data_dir):
-    """Create sample input parquet file with categorical data."""
-    df = pd.DataFrame(
+@pytest.fixture(scope="session")
+def sample_visit_table(cache_dir):
+    """Create sample VISIT_OCCURRENCE parquet file."""
+    table = pa.table(
         {
             "visit_occurrence_id": [1, 2],
             "person_id": [1, 2],
-            "visit_start_datetime": ["2020-01-01", "2020-01-01"],
-            "visit_end_datetime": ["2020-01-01", "2020-01-01"],
-            "visit_type_concept_id": ["1", "1"],
-        }
-    )
-
-    file_path = test_data_dir / "visit" / "VISIT_OCCURRENCE.parquet"
-    df.to_parquet(file_path)
-    return file_path
-
-
-@pytest.fixture
-def sample_concept_table(test_data_dir):
-    """Create a non-exhaustive sample CONCEPT table file.
-
-    There are two items for 'Hepatitis C virus measurement' because one is
-    deprecated and we need to test if it picks the correct one.
-    """
-    df = pd.DataFrame(
-        {
-            "concept_id": [
-                2000001144,
-                2000001147,
-                2000001494,
-                4092846,
-                40627284,
-                9189,
-                9191,
-                8713,
-            ],
-            "concept_name": [
-                "Hemoglobina",
-                "Plaquetas (recuento)",
-                "Albúmina",
-                "Hepatitis C virus measurement",
-                "Hepatitis C virus measurement",
-                "Negative",
-                "Positive",
-                "gram per deciliter",
-            ],
-            "domain_id": [
-                "Measurement",
-                "Measurement",
-                "Measurement",
-                "Measurement",
-                "Measurement",
-                "Meas Value",
-                "Meas Value",
-                "Unit",
-            ],
-            "vocabulary_id": [
-                "CLC",
-                "CLC",
-                "CLC",
-                "SNOMED",
-                "SNOMED",
-                "SNOMED",
-                "SNOMED",
-                "UCUM",
-            ],
-            "standard_code": [None, None, None, "S", None, "S", "S", "S"],
-            "concept_code": [
-                "CLC00195",
-                "CLC00198",
-                "CLC00606",
-                "187033005",
-                "77958005",
-                "260385009",
-                "10828004",
-                "g/dL",
-            ],
-        }
-    )
-
-    file_path = test_data_dir / "vocab" / "CONCEPT.parquet"
-    df.to_parquet(file_path)
-    return file_path
-
-
-@pytest.fixture
-def sample_concept_relationship_table(test_data_dir):
-    """
-    Create a non-exhaustive sample CONCEPT_RELATIONSHIP table file.
-    """
-    df = pd.DataFrame(
-        {
-            "concept_id_1": [
-                2000001144,
-                2000001147,
-                2000001494,
-                4092846,
-                40627284,
-                9189,
-                9191,
-                8713,
-            ],
-            "concept_id_2": [
-                3000963,
-                3024929,
-                3024561,
-                4092846,
-                4092846,
-                9189,
-                9191,
-                8713,
-            ],
-            "relationship_id": [
-                "Maps to",
-                "Maps to",
-                "Maps to",
-                "Maps to",
-                "Maps to",
-                "Maps to",
-                "Maps to",
-                "Maps to",
-            ],
-        }
+            "visit_start_datetime": [datetime(2020, 1, 1), datetime(2020, 1, 1)],
+            "visit_end_datetime": [datetime(2020, 1, 1), datetime(2020, 1, 1)],
+            "visit_type_concept_id": [1, 1],
+        },
+        schema=VISIT_OCCURRENCE_SCHEMA,
     )
 
-    file_path = test_data_dir / "vocab" / "CONCEPT_RELATIONSHIP.parquet"
-    df.to_parquet(file_path)
+    file_path = cache_dir / "visit" / "VISIT_OCCURRENCE.parquet"
+    write_parquet(table, file_path)
     return file_path
 
 
-@pytest.fixture
-def sample_clc_table(test_data_dir):
-    """
-    Create a non-exhaustive sample CLC-BPS vocabulary table file.
-    """
-    df = pd.DataFrame(
-        {
-            "NombreConvCLC": ["Hemoglobina", "Plaquetas (recuento)", "Albúmina"],
-            "UnidadConv": ["g/dL", "x 10^3/µL", "g/dL"],
-        }
-    )
-
-    file_path = test_data_dir / "vocab" / "CLC.parquet"
-    df.to_parquet(file_path)
-    return file_path
+@pytest.fixture(params=SCENARIOS)
+def scenario(request):
+    """Scenario of the measurement pipeline to run."""
+    return request.param
 
 
 def test_full_processing(
@@ -258,41 +239,31 @@ def test_full_processing(
     sample_concept_table,
     sample_concept_relationship_table,
     sample_clc_table,
+    scenario,
 ):
     """Test a 'simple' run of process_measurement_table."""
     # Create params
     data_dir = test_data_dir
-    params_measurement = ext.read_yaml_params(sample_params)
+    params_file, _ = sample_params
+    params_measurement = {**ext.read_yaml_params(params_file), **scenario.params}
 
     # Create output
     mea.process_measurement_table(data_dir, params_measurement)
-    measurement_table = pd.read_parquet(
-        test_data_dir / "output" / "MEASUREMENT.parquet"
-    )
-
-    # Create synth output to compare
-    person_id = pd.Series([1, 1, 1, 2, 2])
-    measurement_concept_id = pd.Series([3000963, 3024929, 4092846, 3024561, 4092846])
-    value_as_number = pd.Series([11.0, 22.0, np.nan, 33.0, np.nan])
-    value_as_concept_id = pd.Series([np.nan, np.nan, 9189, np.nan, 9191])
-    unit_concept_id = pd.Series([8713, 8848, np.nan, 8713, np.nan])
-
-    out = pd.DataFrame(
-        {
-            "person_id": person_id,
-            "measurement_concept_id": measurement_concept_id,
-            "value_as_number": value_as_number,
-            "value_as_concept_id": value_as_concept_id,
-            "unit_concept_id": unit_concept_id,
-        }
-    )
+    measurement_table = parquet.read_table(
+        test_data_dir / "output" / "MEASUREMENT.parquet",
+        columns=[
+            "measurement_id",
+            "person_id",
+            "measurement_concept_id",
+            "value_as_number",
+            "value_as_concept_id",
+            "unit_concept_id",
+        ],
+    ).to_pandas()
 
     measurement_table = measurement_table.sort_values(
         ["person_id", "measurement_concept_id"]
     ).reset_index(drop=True)
-    out = out.sort_values(["person_id", "measurement_concept_id"]).reset_index(
-        drop=True
-    )
 
     # General verifications
     assert measurement_table is not None
@@ -300,18 +271,10 @@ def test_full_processing(
 
     # Check columns
     assert len(measurement_table["measurement_id"].unique()) == len(measurement_table)
-    assert np.all(measurement_table["person_id"] == out["person_id"])
-    assert np.all(
-        measurement_table["measurement_concept_id"] == out["measurement_concept_id"]
-    )
-    assert np.allclose(
-        measurement_table["value_as_number"], out["value_as_number"], equal_nan=True
-    )
-    assert np.allclose(
-        measurement_table["value_as_concept_id"],
-        out["value_as_concept_id"],
-        equal_nan=True,
-    )
-    assert np.allclose(
-        measurement_table["unit_concept_id"], out["unit_concept_id"], equal_nan=True
-    )
+    expected_columns = {**EXPECTED_COLUMNS, "unit_concept_id": scenario.unit_concept_id}
+    for column, expected in expected_columns.items():
+        np.testing.assert_allclose(
+            measurement_table[column].to_numpy(dtype=np.float64),
+            expected,
+            err_msg=column,
+        )
@@ -8,21 +8,43 @@ import pytest
 import yaml
 
 from bps_to_omop.omop_schemas import omop_schemas
+from tests.helpers import stage_files, write_parquet
+
+
+@pytest.fixture(scope="session")
+def cache_dir(tmp_path_factory):
+    """Create a session directory where the input files are written once."""
+    cache_dir = tmp_path_factory.mktemp("provider")
+    (cache_dir / "input").mkdir()
+    return cache_dir
+
+
+@pytest.fixture(scope="session")
+def cached_files(cache_dir, sample_params, sample_input_data):
+    """Session directory holding every input file of the tests."""
+    return cache_dir
 
 
 @pytest.fixture
-def test_data_dir(tmp_path):
-    """Create a temporary directory structure for testing."""
-    input_dir = tmp_path / "input"
-    output_dir = tmp_path / "output"
-    input_dir.mkdir()
-    output_dir.mkdir()
+def test_data_dir(tmp_path, cached_files):
+    """Create a temporary directory structure for testing.
+
+    The input files are linked from the session cache instead of being
+    written again for every test.
+    """
+    # input is created when its files are staged
+    stage_files(cached_files, tmp_path)
+    (tmp_path / "output").mkdir()
     return tmp_path
 
 
-@pytest.fixture
-def sample_params(test_data_dir):
-    """Create a sample parameters file."""
+@pytest.fixture(scope="session")
+def sample_params(cache_dir):
+    """Create a sample parameters file.
+
+    Returns the path of the file and the parameters it holds, so tests
+    that only need the parameters do not parse the file again.
+    """
     params = {
         "input_dir": "input",
         "output_dir": "output",
@@ -34,15 +56,15 @@ def sample_params(test_data_dir):
         "unmapped_specialty": {"NUEVA_ESPECIALIDAD": 0},
     }
 
-    params_file = test_data_dir / "test_params.yaml"
+    params_file = cache_dir / "test_params.yaml"
     with open(params_file, "w") as f:
-        yaml.dump(params, f)
+        yaml.safe_dump(params, f, sort_keys=False)
 
-    return params_file
+    return params_file, params
 
 
-@pytest.fixture
-def sample_input_data(test_data_dir):
+@pytest.fixture(scope="session")
+def sample_input_data(cache_dir):
     """Create sample input parquet file."""
     df = pd.DataFrame(
         {
@@ -55,8 +77,8 @@ def sample_input_data(test_data_dir):
         }
     )
 
-    file_path = test_data_dir / "input" / "test_provider.parquet"
-    df.to_parquet(file_path)
+    file_path = cache_dir / "input" / "test_provider.parquet"
+    write_parquet(df, file_path)
     return file_path
 
 
@@ -66,8 +88,7 @@ def test_specialty_mapping(test_data_dir, sample_input_data, sample_params):
     df = pd.read_parquet(sample_input_data)
 
     # Load parameters
-    with open(sample_params, encoding="utf-8") as f:
-        params = yaml.safe_load(f)
+    _, params = sample_params
 
     # Check unique specialties
     unique_spe = df["ESPECIALIDAD"].unique()
@@ -106,8 +127,7 @@ def test_unmapped_specialty_handling(test_data_dir, sample_input_data, sample_pa
     df = pd.read_parquet(sample_input_data)
 
     # Load parameters
-    with open(sample_params) as f:
-        params = yaml.safe_load(f)
+    _, params = sample_params
 
     # Check that NUEVA_ESPECIALIDAD is in unmapped specialties
     assert "NUEVA_ESPECIALIDAD" in params["unmapped_specialty"]
@@ -129,13 +149,3 @@ def test_unique_provider_ids(test_data_dir, sample_input_data, sample_params):
         # Check they're sequential starting from 0
         assert min(provider_ids) == 0
         assert max(provider_ids) == len(provider_ids) - 1
-
-
-@pytest.fixture(autouse=True)
-def cleanup(test_data_dir):
-    """Clean up test files after each test."""
-    yield
-    import shutil
-
-    if test_data_dir.exists():
-        shutil.rmtree(test_data_dir)
@@ -1,9 +1,9 @@
-import sys
+import datetime
 
 import pandas as pd
 
-sys.path.append("../bps_to_omop/")
-from utils.process_dates import find_overlap_index
+from bps_to_omop.utils.process_dates import find_overlap_index
+from tests.helpers import to_date
 
 
 # == TESTS ==============================================================================
@@ -17,8 +17,8 @@ def test_no_overlap():
             "visit_type": ["A", "B", "C"],
         }
     ).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
+        start_date=lambda x: to_date(x["start_date"]),
+        end_date=lambda x: to_date(x["end_date"]),
     )
 
     result = find_overlap_index(df)
@@ -36,8 +36,8 @@ def test_simple_overlap():
             "visit_type": ["A", "B", "C"],
         }
     ).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
+        start_date=lambda x: to_date(x["start_date"]),
+        end_date=lambda x: to_date(x["end_date"]),
     )
 
     result = find_overlap_index(df)
@@ -55,8 +55,8 @@ def test_exact_dates_single_day():
             "visit_type": ["A", "B", "C"],
         }
     ).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
+        start_date=lambda x: to_date(x["start_date"]),
+        end_date=lambda x: to_date(x["end_date"]),
     )
     result = find_overlap_index(df)
 
@@ -75,8 +75,8 @@ def test_exact_dates_multiday():
             "visit_type": ["A", "B"],
         }
     ).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
+        start_date=lambda x: to_date(x["start_date"]),
+        end_date=lambda x: to_date(x["end_date"]),
     )
 
     result = find_overlap_index(df)
@@ -94,8 +94,8 @@ def test_different_patients():
             "visit_type": ["A", "B"],
         }
     ).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
+        start_date=lambda x: to_date(x["start_date"]),
+        end_date=lambda x: to_date(x["end_date"]),
     )
 
     result = find_overlap_index(df)
@@ -109,8 +109,8 @@ def test_empty_dataframe():
     df = pd.DataFrame(
         {"person_id": [], "start_date": [], "end_date": [], "visit_type": []}
     ).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
+        start_date=lambda x: to_date(x["start_date"]),
+        end_date=lambda x: to_date(x["end_date"]),
     )
 
     result = find_overlap_index(df)
@@ -127,8 +127,8 @@ def test_single_row():
             "visit_type": ["A"],
         }
     ).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
+        start_date=lambda x: to_date(x["start_date"]),
+        end_date=lambda x: to_date(x["end_date"]),
     )
 
     result = find_overlap_index(df)
@@ -151,8 +151,8 @@ def test_multiple_overlaps():
             "visit_type": ["A", "B", "C", "D"],
         }
     ).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
+        start_date=lambda x: to_date(x["start_date"]),
+        end_date=lambda x: to_date(x["end_date"]),
     )
 
     result = find_overlap_index(df)
@@ -170,8 +170,8 @@ def test_mixed_single_and_multiple_day_visits():
             "visit_type": ["A", "B", "C"],
         }
     ).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
+        start_date=lambda x: to_date(x["start_date"]),
+        end_date=lambda x: to_date(x["end_date"]),
     )
 
     result = find_overlap_index(df)
@@ -191,10 +191,36 @@ def test_invalid_date_order():
             "visit_type": ["A", "B"],
         }
     ).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
+        start_date=lambda x: to_date(x["start_date"]),
+        end_date=lambda x: to_date(x["end_date"]),
     )
 
     result = find_overlap_index(df)
     expected = pd.Series([False, False])
     pd.testing.assert_series_equal(result, expected)
+
+
+def test_object_dates_with_missing_values():
+    """Test object date columns holding None, missing dates never overlap"""
+    df = pd.DataFrame(
+        {
+            "person_id": [1, 1, 1, 2],
+            "start_date": [
+                datetime.date(2024, 1, 1),
+                datetime.date(2024, 1, 5),
+                None,
+                datetime.date(2024, 1, 1),
+            ],
+            "end_date": [
+                datetime.date(2024, 1, 31),
+                datetime.date(2024, 1, 20),
+                datetime.date(2024, 1, 25),
+                None,
+            ],
+            "visit_type": ["A", "B", "C", "D"],
+        }
+    )
+
+    result = find_overlap_index(df)
+    expected = pd.Series([False, True, False, False])
+    pd.testing.assert_series_equal(result, expected)
@@ -1,9 +1,7 @@
-import sys
-
 import pandas as pd
 
-sys.path.append("../bps_to_omop/")
-from utils.process_dates import group_dates
+from bps_to_omop.utils.process_dates import group_dates
+from tests.helpers import assert_equal_relaxed, to_date
 
 
 # == TESTS =============================================================================
@@ -21,8 +19,8 @@ def test_simple_grouping():
         (1, "2022-01-01", "2022-01-01", 2),
     ]
     df_in = pd.DataFrame.from_records(df_in, columns=nombre_columnas).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
+        start_date=lambda x: to_date(x["start_date"]),
+        end_date=lambda x: to_date(x["end_date"]),
     )
 
     df_out = [
@@ -33,11 +31,11 @@ def test_simple_grouping():
         (1, "2022-01-01", "2022-01-01", 2),
     ]
     df_out = pd.DataFrame.from_records(df_out, columns=nombre_columnas).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
+        start_date=lambda x: to_date(x["start_date"]),
+        end_date=lambda x: to_date(x["end_date"]),
     )
     result = group_dates(df_in, n_days).reset_index(drop=True)
-    pd.testing.assert_frame_equal(result, df_out)
+    assert_equal_relaxed(result, df_out)
 
 
 def test_concatenated_dates():
@@ -50,19 +48,19 @@ def test_concatenated_dates():
         (2, "2020-06-01", "2020-12-01", 2),
     ]
     df_in = pd.DataFrame.from_records(df_in, columns=nombre_columnas).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
+        start_date=lambda x: to_date(x["start_date"]),
+        end_date=lambda x: to_date(x["end_date"]),
     )
 
     df_out = [
         (2, "2020-01-01", "2020-12-01", 1),
     ]
     df_out = pd.DataFrame.from_records(df_out, columns=nombre_columnas).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
+        start_date=lambda x: to_date(x["start_date"]),
+        end_date=lambda x: to_date(x["end_date"]),
     )
     result = group_dates(df_in, n_days).reset_index(drop=True)
-    pd.testing.assert_frame_equal(result, df_out)
+    assert_equal_relaxed(result, df_out)
 
 
 def test_dates_not_close():
@@ -75,8 +73,8 @@ def test_dates_not_close():
         (3, "2024-03-01", "2024-04-01", 3),
     ]
     df_in = pd.DataFrame.from_records(df_in, columns=nombre_columnas).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
+        start_date=lambda x: to_date(x["start_date"]),
+        end_date=lambda x: to_date(x["end_date"]),
     )
 
     df_out = [
@@ -85,11 +83,11 @@ def test_dates_not_close():
         (3, "2024-03-01", "2024-04-01", 3),
     ]
     df_out = pd.DataFrame.from_records(df_out, columns=nombre_columnas).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
+        start_date=lambda x: to_date(x["start_date"]),
+        end_date=lambda x: to_date(x["end_date"]),
     )
     result = group_dates(df_in, n_days).reset_index(drop=True)
-    pd.testing.assert_frame_equal(result, df_out)
+    assert_equal_relaxed(result, df_out)
 
 
 def test_dates_close_but_different_person():
@@ -101,8 +99,8 @@ def test_dates_close_but_different_person():
         (5, "2025-01-01", "2025-02-01", 2),
     ]
     df_in = pd.DataFrame.from_records(df_in, columns=nombre_columnas).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
+        start_date=lambda x: to_date(x["start_date"]),
+        end_date=lambda x: to_date(x["end_date"]),
     )
 
     df_out = [
@@ -110,11 +108,11 @@ def test_dates_close_but_different_person():
         (5, "2025-01-01", "2025-02-01", 2),
     ]
     df_out = pd.DataFrame.from_records(df_out, columns=nombre_columnas).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
+        start_date=lambda x: to_date(x["start_date"]),
+        end_date=lambda x: to_date(x["end_date"]),
     )
     result = group_dates(df_in, n_days).reset_index(drop=True)
-    pd.testing.assert_frame_equal(result, df_out)
+    assert_equal_relaxed(result, df_out)
 
 
 def test_dates_close_enough_but_sparse():
@@ -129,16 +127,16 @@ def test_dates_close_enough_but_sparse():
         (6, "2023-01-01", "2023-12-01", 2),
     ]
     df_in = pd.DataFrame.from_records(df_in, columns=nombre_columnas).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
+        start_date=lambda x: to_date(x["start_date"]),
+        end_date=lambda x: to_date(x["end_date"]),
     )
 
     df_out = [
         (6, "2020-01-01", "2023-12-01", 2),
     ]
     df_out = pd.DataFrame.from_records(df_out, columns=nombre_columnas).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
+        start_date=lambda x: to_date(x["start_date"]),
+        end_date=lambda x: to_date(x["end_date"]),
     )
     result = group_dates(df_in, n_days).reset_index(drop=True)
-    pd.testing.assert_frame_equal(result, df_out)
+    assert_equal_relaxed(result, df_out)
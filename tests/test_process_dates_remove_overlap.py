@@ -1,404 +1,363 @@
-import sys
+import datetime
 
 import pandas as pd
 import pytest
 
-sys.path.append("../bps_to_omop/")
-from utils.process_dates import remove_overlap
+from bps_to_omop.utils.process_dates import remove_overlap
+from tests.helpers import to_date
 
+DEFAULT_SORTING = ["person_id", "start_date", "end_date", "visit_type"]
+DEFAULT_ASCENDING = [True, True, False, True]
+PROVIDER_SORTING = ["person_id", "start_date", "end_date", "visit_type", "provider_id"]
+PROVIDER_ASCENDING = [True, True, False, True, True]
 
-# == TESTS =============================================================================
-def test_simple_overlap():
-    """Test when there is basic overlap"""
-    df_in = pd.DataFrame(
+
+def mk_visits(person_id, start_date, end_date, **other_columns):
+    """Build a visits dataframe with parsed date columns.
+
+    Any extra keyword is added as a column, in the order given.
+    """
+    return pd.DataFrame(
         {
-            "person_id": [1, 1, 2],
-            "start_date": ["2024-01-01", "2024-01-05", "2024-03-01"],
-            "end_date": ["2024-01-31", "2024-01-05", "2024-03-31"],
-            "visit_type": ["A", "B", "C"],
+            "person_id": person_id,
+            "start_date": to_date(start_date),
+            "end_date": to_date(end_date),
+            **other_columns,
         }
-    ).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
     )
-    df_out = pd.DataFrame(
-        {
-            "person_id": [1, 2],
-            "start_date": ["2024-01-01", "2024-03-01"],
-            "end_date": ["2024-01-31", "2024-03-31"],
-            "visit_type": ["A", "C"],
-        }
-    ).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
+
+
+# == FIXTURES ==========================================================================
+@pytest.fixture(
+    scope="module",
+    params=[
+        pytest.param(
+            (
+                {
+                    "person_id": [1, 1, 2],
+                    "start_date": ["2024-01-01", "2024-01-05", "2024-03-01"],
+                    "end_date": ["2024-01-31", "2024-01-05", "2024-03-31"],
+                    "visit_type": ["A", "B", "C"],
+                },
+                {
+                    "person_id": [1, 2],
+                    "start_date": ["2024-01-01", "2024-03-01"],
+                    "end_date": ["2024-01-31", "2024-03-31"],
+                    "visit_type": ["A", "C"],
+                },
+                DEFAULT_SORTING,
+                DEFAULT_ASCENDING,
+            ),
+            id="simple_overlap",
+        ),
+        # Overlapping single-day visits are all kept
+        pytest.param(
+            (
+                {
+                    "person_id": [1, 1, 2],
+                    "start_date": ["2024-01-01", "2024-01-01", "2024-01-01"],
+                    "end_date": ["2024-01-01", "2024-01-01", "2024-01-31"],
+                    "visit_type": ["A", "B", "C"],
+                },
+                {
+                    "person_id": [1, 1, 2],
+                    "start_date": ["2024-01-01", "2024-01-01", "2024-01-01"],
+                    "end_date": ["2024-01-01", "2024-01-01", "2024-01-31"],
+                    "visit_type": ["A", "B", "C"],
+                },
+                DEFAULT_SORTING,
+                DEFAULT_ASCENDING,
+            ),
+            id="exact_dates_single_day",
+        ),
+        # Visits with exactly the same dates keep the first one
+        pytest.param(
+            (
+                {
+                    "person_id": [1, 1],
+                    "start_date": ["2024-01-01", "2024-01-01"],
+                    "end_date": ["2024-01-31", "2024-01-31"],
+                    "visit_type": ["A", "B"],
+                },
+                {
+                    "person_id": [1],
+                    "start_date": ["2024-01-01"],
+                    "end_date": ["2024-01-31"],
+                    "visit_type": ["A"],
+                },
+                DEFAULT_SORTING,
+                DEFAULT_ASCENDING,
+            ),
+            id="exact_dates_multiday",
+        ),
+        # Overlaps are only detected within same person_id
+        pytest.param(
+            (
+                {
+                    "person_id": [1, 2],
+                    "start_date": ["2024-01-01", "2024-01-15"],
+                    "end_date": ["2024-01-30", "2024-01-20"],
+                    "visit_type": ["A", "B"],
+                },
+                {
+                    "person_id": [1, 2],
+                    "start_date": ["2024-01-01", "2024-01-15"],
+                    "end_date": ["2024-01-30", "2024-01-20"],
+                    "visit_type": ["A", "B"],
+                },
+                DEFAULT_SORTING,
+                DEFAULT_ASCENDING,
+            ),
+            id="different_patients",
+        ),
+        # Here we should remove the second row on first iteration. The other
+        # would be removed in subsequent iterations!
+        pytest.param(
+            (
+                {
+                    "person_id": [1, 1, 1, 1],
+                    "start_date": [
+                        "2024-01-01",
+                        "2024-01-05",
+                        "2024-01-15",
+                        "2024-01-25",
+                    ],
+                    "end_date": [
+                        "2024-01-31",
+                        "2024-01-20",
+                        "2024-01-25",
+                        "2024-01-28",
+                    ],
+                    "visit_type": ["A", "B", "C", "D"],
+                },
+                {
+                    "person_id": [1],
+                    "start_date": ["2024-01-01"],
+                    "end_date": ["2024-01-31"],
+                    "visit_type": ["A"],
+                },
+                DEFAULT_SORTING,
+                DEFAULT_ASCENDING,
+            ),
+            id="multiple_overlaps",
+        ),
+        pytest.param(
+            (
+                {
+                    "person_id": [1, 1, 1],
+                    "start_date": ["2024-01-01", "2024-01-01", "2024-01-02"],
+                    "end_date": ["2024-01-01", "2024-01-05", "2024-01-03"],
+                    "visit_type": ["A", "B", "C"],
+                },
+                {
+                    "person_id": [1],
+                    "start_date": ["2024-01-01"],
+                    "end_date": ["2024-01-05"],
+                    "visit_type": ["B"],
+                },
+                DEFAULT_SORTING,
+                DEFAULT_ASCENDING,
+            ),
+            id="mixed_single_and_multiple_day_visits",
+        ),
+        # Single day visits with different providers are all kept
+        pytest.param(
+            (
+                {
+                    "person_id": [1, 1, 1],
+                    "start_date": ["2024-01-01", "2024-01-01", "2024-01-01"],
+                    "end_date": ["2024-01-01", "2024-01-01", "2024-01-01"],
+                    "provider_id": [0, 1, 2],
+                    "visit_type": ["A", "B", "C"],
+                },
+                {
+                    "person_id": [1, 1, 1],
+                    "start_date": ["2024-01-01", "2024-01-01", "2024-01-01"],
+                    "end_date": ["2024-01-01", "2024-01-01", "2024-01-01"],
+                    "provider_id": [0, 1, 2],
+                    "visit_type": ["A", "B", "C"],
+                },
+                PROVIDER_SORTING,
+                PROVIDER_ASCENDING,
+            ),
+            id="provider_id_singleday",
+        ),
+        pytest.param(
+            (
+                {
+                    "person_id": [1, 1, 1],
+                    "start_date": ["2024-01-01", "2024-01-01", "2024-01-01"],
+                    "end_date": ["2024-01-05", "2024-01-01", "2024-01-06"],
+                    "provider_id": [0, 1, 2],
+                    "visit_type": ["A", "B", "C"],
+                },
+                {
+                    "person_id": [1],
+                    "start_date": ["2024-01-01"],
+                    "end_date": ["2024-01-06"],
+                    "provider_id": [2],
+                    "visit_type": ["C"],
+                },
+                PROVIDER_SORTING,
+                PROVIDER_ASCENDING,
+            ),
+            id="provider_id_singleday_and_multiday",
+        ),
+    ],
+)
+def overlap_case(request):
+    """Input and expected frames for remove_overlap, built once per module.
+
+    Returns (df_in, df_out, sorting_columns, ascending_order).
+    """
+    visits_in, visits_out, sorting_columns, ascending_order = request.param
+    return (
+        mk_visits(**visits_in),
+        mk_visits(**visits_out),
+        sorting_columns,
+        ascending_order,
     )
+
+
+# == TESTS =============================================================================
+@pytest.mark.parametrize("backend", ["pandas", "polars"])
+def test_remove_overlap(overlap_case, backend):
+    """Test overlapping rows are removed and the rest are kept"""
+    df_in, df_out, sorting_columns, ascending_order = overlap_case
+
     result = remove_overlap(
-        df_in,
-        sorting_columns=["person_id", "start_date", "end_date", "visit_type"],
-        ascending_order=[True, True, False, True],
-    ).reset_index(drop=True)
+        df_in.copy(),
+        sorting_columns=sorting_columns,
+        ascending_order=ascending_order,
+        backend=backend,
+    )
     pd.testing.assert_frame_equal(result, df_out)
 
 
 def test_bad_input_lenght():
     """Test that different lengths are not allowed"""
-    df_in = pd.DataFrame(
-        {
-            "person_id": [1, 1, 2],
-            "start_date": ["2024-01-01", "2024-01-05", "2024-03-01"],
-            "end_date": ["2024-01-31", "2024-01-05", "2024-03-31"],
-            "visit_type": ["A", "B", "C"],
-        }
-    ).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
+    df_in = mk_visits(
+        person_id=[1, 1, 2],
+        start_date=["2024-01-01", "2024-01-05", "2024-03-01"],
+        end_date=["2024-01-31", "2024-01-05", "2024-03-31"],
+        visit_type=["A", "B", "C"],
     )
 
     with pytest.raises(ValueError):
         _ = remove_overlap(
             df_in,
-            sorting_columns=["person_id", "start_date", "end_date", "visit_type"],
+            sorting_columns=DEFAULT_SORTING,
             ascending_order=[True, True, False],
         ).reset_index(drop=True)
 
 
-def test_warning_non_default_sorting():
+@pytest.mark.parametrize(
+    "sorting_columns, ascending_order",
+    [
+        pytest.param(
+            ["person_id", "visit_type", "start_date", "end_date"],
+            [True, True, False, True],
+            id="non_default_sorting",
+        ),
+        pytest.param(
+            DEFAULT_SORTING,
+            [True, True, True, True],
+            id="non_default_ascending",
+        ),
+    ],
+)
+def test_warning_non_default_order(sorting_columns, ascending_order):
     """Test that a warning is raise when non defaults are used"""
-    df_in = pd.DataFrame(
-        {
-            "person_id": [1, 1, 2],
-            "start_date": ["2024-01-01", "2024-01-05", "2024-03-01"],
-            "end_date": ["2024-01-31", "2024-01-05", "2024-03-31"],
-            "visit_type": ["A", "B", "C"],
-        }
-    ).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
+    df_in = mk_visits(
+        person_id=[1, 1, 2],
+        start_date=["2024-01-01", "2024-01-05", "2024-03-01"],
+        end_date=["2024-01-31", "2024-01-05", "2024-03-31"],
+        visit_type=["A", "B", "C"],
     )
 
     with pytest.warns(UserWarning):
         _ = remove_overlap(
             df_in,
-            sorting_columns=["person_id", "visit_type", "start_date", "end_date"],
-            ascending_order=[True, True, False, True],
+            sorting_columns=sorting_columns,
+            ascending_order=ascending_order,
         ).reset_index(drop=True)
 
 
-def test_warning_non_default_ascending():
-    """Test that a warning is raise when non defaults are used"""
-    df_in = pd.DataFrame(
+def test_object_dates_with_missing_values():
+    """Test object date columns holding None are handled as before"""
+    df = pd.DataFrame(
         {
-            "person_id": [1, 1, 2],
-            "start_date": ["2024-01-01", "2024-01-05", "2024-03-01"],
-            "end_date": ["2024-01-31", "2024-01-05", "2024-03-31"],
-            "visit_type": ["A", "B", "C"],
+            "person_id": [1, 1, 1, 2],
+            "start_date": [
+                datetime.date(2024, 1, 1),
+                datetime.date(2024, 1, 5),
+                None,
+                datetime.date(2024, 1, 1),
+            ],
+            "end_date": [
+                datetime.date(2024, 1, 31),
+                datetime.date(2024, 1, 20),
+                datetime.date(2024, 1, 25),
+                None,
+            ],
+            "visit_type": ["A", "B", "C", "D"],
         }
-    ).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
     )
 
-    with pytest.warns(UserWarning):
-        _ = remove_overlap(
-            df_in,
-            sorting_columns=["person_id", "start_date", "end_date", "visit_type"],
-            ascending_order=[True, True, True, True],
-        ).reset_index(drop=True)
-
-
-def test_exact_dates_single_day():
-    """Test handling of overlapping single-day visits"""
-    df_in = pd.DataFrame(
-        {
-            "person_id": [1, 1, 2],
-            "start_date": ["2024-01-01", "2024-01-01", "2024-01-01"],
-            "end_date": ["2024-01-01", "2024-01-01", "2024-01-31"],
-            "visit_type": ["A", "B", "C"],
-        }
-    ).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
-    )
-    df_out = pd.DataFrame(
-        {
-            "person_id": [1, 1, 2],
-            "start_date": ["2024-01-01", "2024-01-01", "2024-01-01"],
-            "end_date": ["2024-01-01", "2024-01-01", "2024-01-31"],
-            "visit_type": ["A", "B", "C"],
-        }
-    ).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
-    )
     result = remove_overlap(
-        df_in,
-        sorting_columns=["person_id", "start_date", "end_date", "visit_type"],
-        ascending_order=[True, True, False, True],
-    ).reset_index(drop=True)
-
-    pd.testing.assert_frame_equal(result, df_out)
-
-
-def test_exact_dates_multiday():
-    """Test behavior when visits have exactly same dates"""
-    df_in = pd.DataFrame(
-        {
-            "person_id": [1, 1],
-            "start_date": ["2024-01-01", "2024-01-01"],
-            "end_date": ["2024-01-31", "2024-01-31"],
-            "visit_type": ["A", "B"],
-        }
-    ).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
-    )
-    df_out = pd.DataFrame(
-        {
-            "person_id": [1],
-            "start_date": ["2024-01-01"],
-            "end_date": ["2024-01-31"],
-            "visit_type": ["A"],
-        }
-    ).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
+        df,
+        sorting_columns=DEFAULT_SORTING,
+        ascending_order=DEFAULT_ASCENDING,
+        backend="pandas",
     )
-    result = remove_overlap(
-        df_in,
-        sorting_columns=["person_id", "start_date", "end_date", "visit_type"],
-        ascending_order=[True, True, False, True],
-    ).reset_index(drop=True)
+    pd.testing.assert_frame_equal(result, df.iloc[[0, 2, 3]].reset_index(drop=True))
 
-    pd.testing.assert_frame_equal(result, df_out)
 
-
-def test_different_patients():
-    """Test that overlaps are only detected within same person_id"""
-    df_in = pd.DataFrame(
-        {
-            "person_id": [1, 2],
-            "start_date": ["2024-01-01", "2024-01-15"],
-            "end_date": ["2024-01-30", "2024-01-20"],
-            "visit_type": ["A", "B"],
-        }
-    ).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
-    )
-    df_out = pd.DataFrame(
-        {
-            "person_id": [1, 2],
-            "start_date": ["2024-01-01", "2024-01-15"],
-            "end_date": ["2024-01-30", "2024-01-20"],
-            "visit_type": ["A", "B"],
-        }
-    ).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
+def test_timezone_aware_dates():
+    """Test timezone-aware date columns are handled as naive ones"""
+    df = mk_visits(
+        person_id=[1, 1, 1, 2],
+        start_date=["2024-01-01", "2024-01-05", "2024-02-01", "2024-01-01"],
+        end_date=["2024-01-31", "2024-01-20", "2024-02-10", "2024-01-31"],
+        visit_type=["A", "B", "C", "D"],
     )
+    df["start_date"] = df["start_date"].dt.tz_localize("Europe/Madrid")
+    df["end_date"] = df["end_date"].dt.tz_localize("Europe/Madrid")
 
     result = remove_overlap(
-        df_in,
-        sorting_columns=["person_id", "start_date", "end_date", "visit_type"],
-        ascending_order=[True, True, False, True],
-    ).reset_index(drop=True)
-    pd.testing.assert_frame_equal(result, df_out)
+        df,
+        sorting_columns=DEFAULT_SORTING,
+        ascending_order=DEFAULT_ASCENDING,
+        backend="pandas",
+    )
+    pd.testing.assert_frame_equal(result, df.iloc[[0, 2, 3]].reset_index(drop=True))
 
 
 # Edge cases
 def test_empty_dataframe():
     """Test behavior with empty DataFrame"""
-    df = pd.DataFrame(
-        {"person_id": [], "start_date": [], "end_date": [], "visit_type": []}
-    ).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
-    )
+    df = mk_visits(person_id=[], start_date=[], end_date=[], visit_type=[])
 
     result = remove_overlap(
         df,
-        sorting_columns=["person_id", "start_date", "end_date", "visit_type"],
-        ascending_order=[True, True, False, True],
+        sorting_columns=DEFAULT_SORTING,
+        ascending_order=DEFAULT_ASCENDING,
     )
     assert len(result) == 0
 
 
 def test_single_row():
     """Test behavior with single row. Should leave it as is."""
-    df = pd.DataFrame(
-        {
-            "person_id": [1],
-            "start_date": ["2024-01-01"],
-            "end_date": ["2024-01-31"],
-            "visit_type": ["A"],
-        }
-    ).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
+    df = mk_visits(
+        person_id=[1],
+        start_date=["2024-01-01"],
+        end_date=["2024-01-31"],
+        visit_type=["A"],
     )
 
     result = remove_overlap(
         df,
-        sorting_columns=["person_id", "start_date", "end_date", "visit_type"],
-        ascending_order=[True, True, False, True],
+        sorting_columns=DEFAULT_SORTING,
+        ascending_order=DEFAULT_ASCENDING,
     )
     pd.testing.assert_frame_equal(result, df)
-
-
-# Complex scenarios
-def test_multiple_overlaps():
-    """
-    Test complex scenario with multiple overlapping visits
-    Here we should remove the second row on first iteration. The other
-    would be removed in subsequent iterations!
-    """
-    df_in = pd.DataFrame(
-        {
-            "person_id": [1, 1, 1, 1],
-            "start_date": ["2024-01-01", "2024-01-05", "2024-01-15", "2024-01-25"],
-            "end_date": ["2024-01-31", "2024-01-20", "2024-01-25", "2024-01-28"],
-            "visit_type": ["A", "B", "C", "D"],
-        }
-    ).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
-    )
-    df_out = pd.DataFrame(
-        {
-            "person_id": [
-                1,
-            ],
-            "start_date": ["2024-01-01"],
-            "end_date": ["2024-01-31"],
-            "visit_type": ["A"],
-        }
-    ).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
-    )
-
-    result = remove_overlap(
-        df_in,
-        sorting_columns=["person_id", "start_date", "end_date", "visit_type"],
-        ascending_order=[True, True, False, True],
-    ).reset_index(drop=True)
-    pd.testing.assert_frame_equal(result, df_out)
-
-
-def test_mixed_single_and_multiple_day_visits():
-    """Test mix of single-day and multiple-day visits"""
-    df_in = pd.DataFrame(
-        {
-            "person_id": [1, 1, 1],
-            "start_date": ["2024-01-01", "2024-01-01", "2024-01-02"],
-            "end_date": ["2024-01-01", "2024-01-05", "2024-01-03"],
-            "visit_type": ["A", "B", "C"],
-        }
-    ).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
-    )
-    df_out = pd.DataFrame(
-        {
-            "person_id": [1],
-            "start_date": ["2024-01-01"],
-            "end_date": ["2024-01-05"],
-            "visit_type": ["B"],
-        }
-    ).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
-    )
-
-    result = remove_overlap(
-        df_in,
-        sorting_columns=["person_id", "start_date", "end_date", "visit_type"],
-        ascending_order=[True, True, False, True],
-    ).reset_index(drop=True)
-    pd.testing.assert_frame_equal(result, df_out)
-
-
-def test_provider_id_singleday():
-    """
-    When we have single day visits with diffeent providers, we should keep all.
-    """
-    df_in = pd.DataFrame(
-        {
-            "person_id": [1, 1, 1],
-            "start_date": ["2024-01-01", "2024-01-01", "2024-01-01"],
-            "end_date": ["2024-01-01", "2024-01-01", "2024-01-01"],
-            "provider_id": [0, 1, 2],
-            "visit_type": ["A", "B", "C"],
-        }
-    ).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
-    )
-    df_out = pd.DataFrame(
-        {
-            "person_id": [1, 1, 1],
-            "start_date": ["2024-01-01", "2024-01-01", "2024-01-01"],
-            "end_date": ["2024-01-01", "2024-01-01", "2024-01-01"],
-            "provider_id": [0, 1, 2],
-            "visit_type": ["A", "B", "C"],
-        }
-    ).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
-    )
-
-    result = remove_overlap(
-        df_in,
-        sorting_columns=[
-            "person_id",
-            "start_date",
-            "end_date",
-            "visit_type",
-            "provider_id",
-        ],
-        ascending_order=[True, True, False, True, True],
-    ).reset_index(drop=True)
-    pd.testing.assert_frame_equal(result, df_out)
-
-
-def test_provider_id_singleday_and_multiday():
-    """
-    When we have single day visits with diffeent providers, we should keep all.
-    """
-    df_in = pd.DataFrame(
-        {
-            "person_id": [1, 1, 1],
-            "start_date": ["2024-01-01", "2024-01-01", "2024-01-01"],
-            "end_date": ["2024-01-05", "2024-01-01", "2024-01-06"],
-            "provider_id": [0, 1, 2],
-            "visit_type": ["A", "B", "C"],
-        }
-    ).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
-    )
-    df_out = pd.DataFrame(
-        {
-            "person_id": [1],
-            "start_date": ["2024-01-01"],
-            "end_date": ["2024-01-06"],
-            "provider_id": [2],
-            "visit_type": ["C"],
-        }
-    ).assign(
-        start_date=lambda x: pd.to_datetime(x["start_date"]),
-        end_date=lambda x: pd.to_datetime(x["end_date"]),
-    )
-
-    result = remove_overlap(
-        df_in,
-        sorting_columns=[
-            "person_id",
-            "start_date",
-            "end_date",
-            "visit_type",
-            "provider_id",
-        ],
-        ascending_order=[True, True, False, True, True],
-    ).reset_index(drop=True)
-    pd.testing.assert_frame_equal(result, df_out)
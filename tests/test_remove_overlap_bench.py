@@ -0,0 +1,61 @@
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bps_to_omop.utils.process_dates import remove_overlap
+
+N_ROWS = 1_000_000
+N_ROUNDS = 3
+
+
+# == FIXTURES ==========================================================================
+@pytest.fixture(scope="module")
+def random_visits():
+    """Random visits, about 10 per person, spread over three years.
+
+    Durations go from 0 to 29 days, so there are single day visits
+    and overlapping multi-day visits.
+    """
+    rng = np.random.default_rng(0)
+    start_date = np.datetime64("2020-01-01", "ns") + rng.integers(
+        0, 3 * 365, N_ROWS
+    ).astype("timedelta64[D]")
+    end_date = start_date + rng.integers(0, 30, N_ROWS).astype("timedelta64[D]")
+    return pd.DataFrame(
+        {
+            "person_id": rng.integers(0, N_ROWS // 10, N_ROWS),
+            "start_date": start_date,
+            "end_date": end_date,
+            "visit_type": rng.integers(0, 5, N_ROWS),
+        }
+    )
+
+
+# == TESTS =============================================================================
+@pytest.mark.benchmark
+@pytest.mark.parametrize("backend", ["pandas", "polars"])
+def test_remove_overlap_bench(random_visits, backend, record_property):
+    """Time remove_overlap on 1M rows. Only runs with --run-benchmarks.
+
+    Timings are reported, not asserted, they depend on the machine.
+    """
+    timings = []
+    for _ in range(N_ROUNDS):
+        start = time.perf_counter()
+        result = remove_overlap(
+            random_visits,
+            sorting_columns=["person_id", "start_date", "end_date", "visit_type"],
+            ascending_order=[True, True, False, True],
+            backend=backend,
+        )
+        timings.append(time.perf_counter() - start)
+
+    record_property("mean_seconds", statistics.mean(timings))
+    print(
+        f"remove_overlap[{backend}] on {N_ROWS} rows: "
+        f"mean {statistics.mean(timings):.3f} s, min {min(timings):.3f} s"
+    )
+    assert 0 < len(result) <= N_ROWS
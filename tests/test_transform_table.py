@@ -1,105 +1,83 @@
+import numpy as np
 import pyarrow as pa
-from utils.transform_table import apply_transformation
-
-
-def test_no_transformations():
-    """Test function when no transformations are specified."""
-    # Create a sample table
-    data = {
-        "person_id": pa.array([1, 2, 3]),
-        "start_date": pa.array([1, 2, 3]),
-        "end_date": pa.array([4, 5, 6]),
-        "type_concept": pa.array([1, 1, 1]),
-    }
-    original_table = pa.Table.from_pydict(data)
-
-    # Prepare params with no transformations
-    params = {}
-
-    # Apply transformation
-    result = apply_transformation(original_table, params, "test_key")
-
-    # Assert the table remains unchanged
-    assert result.equals(original_table)
-
-
-def test_no_file_transformations():
-    """Test function when transformations key is present but none are
-    specified for any file."""
-    # Create a sample table
-    data = {
-        "person_id": pa.array([1, 2, 3]),
-        "start_date": pa.array([1, 2, 3]),
-        "end_date": pa.array([4, 5, 6]),
-        "type_concept": pa.array([1, 1, 1]),
-    }
-    original_table = pa.Table.from_pydict(data)
-
-    # Prepare params with no transformations
-    params = {"transformations": {}}
-
-    # Apply transformation
-    result = apply_transformation(original_table, params, "test_key")
-
-    # Assert the table remains unchanged
-    assert result.equals(original_table)
-
-
-def test_single_transformation():
-    """Test applying a single transformation function."""
-    # Create a sample table
-    data = {
-        "person_id": pa.array([1, 2, 3]),
-        "start_date": pa.array([1, 2, 3]),
-        "end_date": pa.array([4, 5, 6]),
-        "type_concept": pa.array([1, 1, 1]),
-    }
-    original_table = pa.Table.from_pydict(data)
-
-    # Prepare params with transformation
-    params = {"transformations": {"test_key": ["remove_end_date"]}}
-
-    # Apply transformation
-    result = apply_transformation(original_table, params, "test_key")
-
-    # Expected result
-    expected_data = {
-        "person_id": pa.array([1, 2, 3]),
-        "start_date": pa.array([1, 2, 3]),
-        "end_date": pa.array([1, 2, 3]),
-        "type_concept": pa.array([1, 1, 1]),
-    }
-    expected_table = pa.Table.from_pydict(expected_data)
-
-    # Assert the table is transformed correctly
-    assert result.equals(expected_table)
-
-
-def test_multiple_transformations():
-    """Test applying multiple transformation functions."""
-    # Create a sample table
-    data = {
-        "person_id": pa.array([1, 2, 3]),
-        "start_date": pa.array([1, 2, 3]),
-        "end_date": pa.array([4, 5, 6]),
-        "type_concept": pa.array([1, 1, 1]),
-    }
-    original_table = pa.Table.from_pydict(data)
-
-    # Prepare params with multiple transformations
-    params = {"transformations": {"test_key": ["melt_start_end", "remove_end_date"]}}
-
-    # Apply transformation
+import pytest
+
+from bps_to_omop.utils.transform_table import apply_transformation
+from tests.helpers import assert_tables_equal
+
+
+def _int_array(*xs):
+    """Build an int64 Arrow array on top of a contiguous NumPy buffer.
+
+    pyarrow wraps the NumPy buffer without copying it, instead of
+    converting a list of Python ints one by one.
+    """
+    return pa.array(np.fromiter(xs, np.int64, count=len(xs)))
+
+
+SCHEMA = pa.schema(
+    [
+        ("person_id", pa.int64()),
+        ("start_date", pa.int64()),
+        ("end_date", pa.int64()),
+        ("type_concept", pa.int64()),
+    ]
+)
+EXPECTED_REMOVE_END = pa.table(
+    {
+        "person_id": _int_array(1, 2, 3),
+        "start_date": _int_array(1, 2, 3),
+        "end_date": _int_array(1, 2, 3),
+        "type_concept": _int_array(1, 1, 1),
+    },
+    schema=SCHEMA,
+)
+EXPECTED_MELTED = pa.table(
+    {
+        "person_id": _int_array(1, 2, 3, 1, 2, 3),
+        "start_date": _int_array(1, 2, 3, 4, 5, 6),
+        "end_date": _int_array(1, 2, 3, 4, 5, 6),
+        "type_concept": _int_array(1, 1, 1, 1, 1, 1),
+    },
+    schema=SCHEMA,
+)
+
+# None as the expected table means the table must come back unchanged
+CASES = [
+    pytest.param({}, None, id="no_transformations"),
+    pytest.param({"transformations": {}}, None, id="no_file_transformations"),
+    pytest.param(
+        {"transformations": {"test_key": ["remove_end_date"]}},
+        EXPECTED_REMOVE_END,
+        id="single_transformation",
+    ),
+    pytest.param(
+        {"transformations": {"test_key": ["melt_start_end", "remove_end_date"]}},
+        EXPECTED_MELTED,
+        id="multiple_transformations",
+    ),
+]
+
+
+# == FIXTURES ==========================================================================
+@pytest.fixture(scope="module")
+def original_table():
+    """Sample table shared by all tests. Arrow tables are immutable."""
+    return pa.table(
+        {
+            "person_id": _int_array(1, 2, 3),
+            "start_date": _int_array(1, 2, 3),
+            "end_date": _int_array(4, 5, 6),
+            "type_concept": _int_array(1, 1, 1),
+        },
+        schema=SCHEMA,
+    )
+
+
+# == TESTS =============================================================================
+@pytest.mark.parametrize("params, expected", CASES)
+def test_apply_transformation(original_table, params, expected):
+    """Test the transformations listed for a file are applied in order."""
     result = apply_transformation(original_table, params, "test_key")
 
-    # Expected result
-    expected_data = {
-        "person_id": pa.array([1, 2, 3, 1, 2, 3]),
-        "start_date": pa.array([1, 2, 3, 4, 5, 6]),
-        "end_date": pa.array([1, 2, 3, 4, 5, 6]),
-        "type_concept": pa.array([1, 1, 1, 1, 1, 1]),
-    }
-    expected_table = pa.Table.from_pydict(expected_data)
-
-    # Assert the table is transformed correctly
-    assert result.equals(expected_table)
+    assert_tables_equal(result, original_table if expected is None else expected)
@@ -1,18 +1,22 @@
 import os
-import sys
+import shutil
 
 import pytest
 import yaml
 
-sys.path.append("../bps_to_omop/")
-from utils.extract import read_yaml_params, update_yaml_params
+from bps_to_omop.utils.extract import (
+    deferred_yaml,
+    flush_yaml,
+    read_yaml_params,
+    update_yaml_params,
+)
 
 
 # == Fixtures =========================================================
-@pytest.fixture
-def temp_yaml_file(tmp_path):
-    """Create a temporary YAML file with initial content."""
-    file_path = tmp_path / "params.yaml"
+@pytest.fixture(scope="session")
+def yaml_file(tmp_path_factory):
+    """Create a YAML file with initial content, shared by the read-only tests."""
+    file_path = tmp_path_factory.mktemp("yaml") / "params.yaml"
     initial_content = {
         "str": "/path1",
         "list": ["file1", "file2"],
@@ -25,17 +29,44 @@ def temp_yaml_file(tmp_path):
     return file_path
 
 
+@pytest.fixture
+def temp_yaml_file(yaml_file, tmp_path):
+    """Copy of yaml_file for the tests that modify it."""
+    file_path = tmp_path / "params.yaml"
+    shutil.copyfile(yaml_file, file_path)
+
+    return file_path
+
+
 # == Tests ============================================================
-def test_read_existing_file(temp_yaml_file):
+def test_read_existing_file(yaml_file):
     """Test reading from an existing YAML file."""
 
-    result = read_yaml_params(temp_yaml_file)
+    result = read_yaml_params(yaml_file)
 
     assert result["str"] == "/path1"
     assert result["list"] == ["file1", "file2"]
     assert result["dict"] == {"file1": "/path1", "file2": "/path2"}
 
 
+def test_read_returns_a_copy(yaml_file):
+    """Test modifying the returned contents does not change later reads."""
+    result = read_yaml_params(yaml_file)
+    result["list"].append("file3")
+
+    assert read_yaml_params(yaml_file)["list"] == ["file1", "file2"]
+
+
+def test_read_sees_file_changes(temp_yaml_file):
+    """Test a file edited after being read is parsed again."""
+    read_yaml_params(temp_yaml_file)
+
+    with open(temp_yaml_file, "w", encoding="utf-8") as f:
+        yaml.safe_dump({"str": "/path2"}, f)
+
+    assert read_yaml_params(temp_yaml_file) == {"str": "/path2"}
+
+
 def test_create_new_file_with_dict(tmp_path):
     """Test creating a new YAML file with a new dict if it doesn't exist."""
     new_file = tmp_path / "new_params.yaml"
@@ -60,6 +91,33 @@ def test_create_new_file_with_value(tmp_path):
     assert os.path.exists(new_file)
 
 
+def test_pending_updates_keep_caller_dict(tmp_path):
+    """Test later updates to a pending file do not modify the dict given."""
+    new_file = tmp_path / "new_params.yaml"
+    new_setting = {"new_setting": "new_value"}
+
+    with deferred_yaml():
+        update_yaml_params(str(new_file), "new_setting", new_setting)
+        update_yaml_params(str(new_file), "other_setting", "other_value")
+    result = read_yaml_params(str(new_file))
+
+    assert new_setting == {"new_setting": "new_value"}
+    assert result == {"new_setting": "new_value", "other_setting": "other_value"}
+
+
+def test_deferred_update_keeps_a_copy(temp_yaml_file):
+    """Test changing the data after a deferred update does not change the file."""
+    new_dict = {"file3": {"path": "path3"}}
+    with deferred_yaml():
+        update_yaml_params(temp_yaml_file, "new_dict", new_dict)
+        new_dict["file3"]["path"] = "changed"
+
+    with open(temp_yaml_file, encoding="utf-8") as f:
+        result = yaml.safe_load(f)
+
+    assert result["new_dict"] == {"file3": {"path": "path3"}}
+
+
 def test_empty_updates(temp_yaml_file):
     """Test applying empty updates."""
     updates = {}
@@ -73,6 +131,14 @@ def test_empty_updates(temp_yaml_file):
     assert result["dict"] == {"file1": "/path1", "file2": "/path2"}
 
 
+def test_same_value_not_rewritten(temp_yaml_file):
+    """Test that updating an entry with its current value does not write."""
+    mtime = os.stat(temp_yaml_file).st_mtime_ns
+    update_yaml_params(temp_yaml_file, "list", ["file1", "file2"])
+
+    assert os.stat(temp_yaml_file).st_mtime_ns == mtime
+
+
 def test_new_string(temp_yaml_file):
     """Test writing new string."""
     new_string = "new_string"
@@ -118,3 +184,71 @@ def test_overwrite_existing_value(temp_yaml_file):
     assert result["str"] == "/path1"
     assert result["list"] == ["file1", "file2"]
     assert result["dict"] == {"file3": "path3", "file4": "path4"}
+
+
+def test_update_written_at_once(temp_yaml_file):
+    """Test updates are written to disk by default."""
+    update_yaml_params(temp_yaml_file, "new_string", "new_string")
+
+    with open(temp_yaml_file, encoding="utf-8") as f:
+        result = yaml.safe_load(f)
+
+    assert result["str"] == "/path1"
+    assert result["new_string"] == "new_string"
+
+
+def test_deferred_updates_written_on_exit(temp_yaml_file):
+    """Test deferred updates are kept in memory until the block ends."""
+    with deferred_yaml():
+        update_yaml_params(temp_yaml_file, "new_string", "new_string")
+        update_yaml_params(temp_yaml_file, "new_list", ["file3", "file4"])
+
+        with open(temp_yaml_file, encoding="utf-8") as f:
+            assert "new_string" not in yaml.safe_load(f)
+        assert read_yaml_params(temp_yaml_file)["new_string"] == "new_string"
+
+    with open(temp_yaml_file, encoding="utf-8") as f:
+        result = yaml.safe_load(f)
+
+    assert result["str"] == "/path1"
+    assert result["new_string"] == "new_string"
+    assert result["new_list"] == ["file3", "file4"]
+    assert os.listdir(temp_yaml_file.parent) == ["params.yaml"]
+
+
+def test_update_keeps_file_mode(temp_yaml_file):
+    """Test the rewritten file keeps the permissions of the original."""
+    os.chmod(temp_yaml_file, 0o640)
+    update_yaml_params(temp_yaml_file, "new_string", "new_string")
+
+    assert os.stat(temp_yaml_file).st_mode & 0o777 == 0o640
+
+
+def test_new_file_mode(tmp_path):
+    """Test a new file gets the permissions of a file made with open()."""
+    reference_path = tmp_path / "reference.yaml"
+    reference_path.touch()
+    file_path = tmp_path / "params.yaml"
+    update_yaml_params(file_path, "new_string", "new_string")
+
+    assert os.stat(file_path).st_mode == os.stat(reference_path).st_mode
+
+
+def test_update_through_symlink(temp_yaml_file):
+    """Test updating a symlink rewrites its target and keeps the link."""
+    link_path = temp_yaml_file.parent / "link.yaml"
+    os.symlink(temp_yaml_file, link_path)
+    update_yaml_params(link_path, "new_string", "new_string")
+
+    assert os.path.islink(link_path)
+    assert read_yaml_params(temp_yaml_file)["new_string"] == "new_string"
+
+
+def test_flush_inside_deferred_block(temp_yaml_file):
+    """Test flush_yaml writes deferred updates before the block ends."""
+    with deferred_yaml():
+        update_yaml_params(temp_yaml_file, "new_string", "new_string")
+        flush_yaml(temp_yaml_file)
+
+        with open(temp_yaml_file, encoding="utf-8") as f:
+            assert yaml.safe_load(f)["new_string"] == "new_string"